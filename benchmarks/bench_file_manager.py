@@ -0,0 +1,212 @@
+"""
+Benchmark suite: FileManager operations over synthetic trees, saved as JSON
+
+Usage:
+    python -m benchmarks.bench_file_manager [--profiles wide,deep,...] [--scale N] [--repeat N]
+                                            [--output FILE] [--compare OLD.json] [--tree-dir DIR]
+"""
+import os
+
+# Scanner syscall counters are read when the scanner module is imported
+os.environ.setdefault("FSV_DEBUG_SYSCALLS", "1")
+
+import argparse
+import json
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from benchmarks.synthetic import PROFILES, generate
+from models.file_manager import FileManager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+IGNORE = [".git", "node_modules", "__pycache__"]
+
+
+def tree_size(root: str) -> Tuple[int, int]:
+    """Number of files and total bytes below root"""
+    files = 0
+    total = 0
+    for folder, _, names in os.walk(root):
+        for name in names:
+            files += 1
+            total += os.path.getsize(os.path.join(folder, name))
+    return files, total
+
+
+def list_files(root: str) -> List[str]:
+    """Every file path below root"""
+    return [os.path.join(folder, name) for folder, _, names in os.walk(root) for name in names]
+
+
+def reset_peak_rss():
+    """Reset the kernel's peak RSS counter where supported (Linux)"""
+    try:
+        with open("/proc/self/clear_refs", "w") as file:
+            file.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_kb() -> Optional[int]:
+    """Peak resident set size of this process in KiB"""
+    try:
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak // 1024 if sys.platform == "darwin" else peak
+    return None
+
+
+def io_syscalls() -> Dict[str, int]:
+    """Read/write syscall counters of this process (Linux only)"""
+    counters = {}
+    try:
+        with open("/proc/self/io") as file:
+            for line in file:
+                key, value = line.split(":")
+                if key in ("syscr", "syscw"):
+                    counters[key] = int(value)
+    except OSError:
+        pass
+    return counters
+
+
+def operations(root: str) -> Dict[str, Callable[[FileManager], object]]:
+    """The FileManager calls being measured, each starting from a cold memory cache"""
+    paths = list_files(root)
+    return {
+        "count_lines_of_code": lambda fm: [fm.count_lines_of_code(path) for path in paths],
+        "generate_ascii_tree": lambda fm: fm.generate_ascii_tree(root, IGNORE),
+        "get_all_files_content": lambda fm: fm.get_all_files_content(root, IGNORE),
+        "get_folder_stats": lambda fm: fm.get_folder_stats(root, IGNORE),
+    }
+
+
+def measure(operation: Callable[[FileManager], object], repeat: int) -> Dict:
+    """Best wall time over repeat cold runs, plus memory and syscall counters of that run"""
+    best = None
+    for _ in range(repeat):
+        file_manager = FileManager()
+        reset_peak_rss()
+        before = io_syscalls()
+        start = time.perf_counter()
+        result = operation(file_manager)
+        elapsed = time.perf_counter() - start
+        after = io_syscalls()
+        file_manager.close()
+
+        syscalls = {key: after[key] - before.get(key, 0) for key in after}
+        if isinstance(result, dict) and 'syscalls' in result:
+            syscalls.update(result['syscalls'])
+        run = {'seconds': elapsed, 'peak_rss_kb': peak_rss_kb(), 'syscalls': syscalls}
+        if best is None or elapsed < best['seconds']:
+            best = run
+        del result
+    return best
+
+
+def run_suite(profiles: List[str], scale: int, repeat: int, tree_dir: str = None) -> Dict:
+    """Generate each profile's tree and time every operation on it"""
+    results = []
+    base = tree_dir or tempfile.mkdtemp(prefix="fsv_bench_")
+    try:
+        for profile in profiles:
+            root = os.path.join(base, profile)
+            if not os.path.isdir(root):
+                generate(profile, base, scale)
+            files, total_bytes = tree_size(root)
+            print(f"{profile}: {files:,} files, {total_bytes / 1e6:,.1f} MB", file=sys.stderr)
+
+            for name, operation in operations(root).items():
+                run = measure(operation, repeat)
+                run.update({
+                    'profile': profile,
+                    'operation': name,
+                    'files': files,
+                    'bytes': total_bytes,
+                    'files_per_second': files / run['seconds'] if run['seconds'] else None,
+                    'mb_per_second': total_bytes / 1e6 / run['seconds'] if run['seconds'] else None,
+                })
+                results.append(run)
+                print(format_result(run), file=sys.stderr)
+    finally:
+        if tree_dir is None:
+            shutil.rmtree(base, ignore_errors=True)
+
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'scale': scale,
+            'repeat': repeat,
+            'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        'results': results,
+    }
+
+
+def format_result(run: Dict) -> str:
+    """One line summary of a measurement"""
+    syscalls = " ".join(f"{key}={value:,}" for key, value in sorted(run['syscalls'].items()))
+    rss = f"{run['peak_rss_kb'] / 1024:7.1f} MB" if run['peak_rss_kb'] else "      n/a"
+    return (f"  {run['operation']:<22} {run['seconds']:8.3f}s "
+            f"{run['files_per_second']:12,.0f} files/s {run['mb_per_second']:9.1f} MB/s "
+            f"rss {rss}  {syscalls}")
+
+
+def compare(old: Dict, new: Dict):
+    """Print the time ratio of every measurement present in both runs"""
+    old_runs = {(run['profile'], run['operation']): run for run in old['results']}
+    print(f"{'profile':<8} {'operation':<22} {'old':>9} {'new':>9} {'change':>8}")
+    for run in new['results']:
+        previous = old_runs.get((run['profile'], run['operation']))
+        if previous is None:
+            continue
+        change = run['seconds'] / previous['seconds'] if previous['seconds'] else float("nan")
+        print(f"{run['profile']:<8} {run['operation']:<22} "
+              f"{previous['seconds']:8.3f}s {run['seconds']:8.3f}s {change:7.2f}x")
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="FileManager benchmark suite")
+    parser.add_argument("--profiles", default=",".join(PROFILES),
+                        help="comma separated synthetic trees (default: %(default)s)")
+    parser.add_argument("--scale", type=int, default=1, help="multiply the size of every tree")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per operation; the fastest is kept")
+    parser.add_argument("--output", default="benchmark-results.json", help="JSON results file")
+    parser.add_argument("--compare", default=None, help="earlier JSON results to compare against")
+    parser.add_argument("--tree-dir", default=None,
+                        help="generate trees here and keep them for later runs (default: temporary)")
+    args = parser.parse_args(argv)
+
+    profiles = [p.strip() for p in args.profiles.split(",") if p.strip()]
+    unknown = [p for p in profiles if p not in PROFILES]
+    if unknown:
+        parser.error(f"unknown profiles: {', '.join(unknown)}")
+
+    report = run_suite(profiles, args.scale, args.repeat, args.tree_dir)
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            compare(json.load(file), report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""
+Benchmark: import time before the first frame and before the full UI, checked against a budget
+
+Runs the interpreter with -X importtime in a fresh process per measurement, so
+nothing is cached in sys.modules. Modules the interpreter loads on its own
+(site, encodings, ...) are left out of the totals.
+
+Usage:
+    python -m benchmarks.bench_startup [--repeat N] [--top N] [--output FILE] [--no-budget]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# What has to be imported for each startup phase, as run with python -c
+PHASES = {
+    "first_frame": "import main",
+    "full_ui": "import main; import controllers.main_controller",
+}
+
+# Import budget of each phase in milliseconds; the benchmark fails above it
+BUDGETS_MS = {
+    "first_frame": 40.0,
+    "full_ui": 80.0,
+}
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# One row of -X importtime output: self and cumulative microseconds, then the indented module name
+ImportRow = Tuple[str, int, int, int]
+
+
+def import_times(code: str) -> List[ImportRow]:
+    """(module, self us, cumulative us, nesting level) for every import made while running code"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=PROJECT_ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"python -c {code!r} failed:\n{result.stderr.strip()}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # the column header
+        name = fields[2][1:]  # drop the separator space; what is left is indented two spaces per level
+        level = (len(name) - len(name.lstrip(" "))) // 2
+        rows.append((name.strip(), int(fields[0]), int(fields[1]), level))
+    return rows
+
+
+def measure_phase(code: str, baseline: set) -> Dict:
+    """Total import time of code, leaving out modules already loaded by an empty interpreter"""
+    rows = [row for row in import_times(code) if row[0] not in baseline]
+    total_us = sum(cumulative for _, _, cumulative, level in rows if level == 0)
+    return {
+        'total_ms': total_us / 1000,
+        'modules': len(rows),
+        'slowest': sorted(
+            ({'module': name, 'self_ms': own / 1000, 'cumulative_ms': cumulative / 1000}
+             for name, own, cumulative, _ in rows),
+            key=lambda module: -module['self_ms']
+        ),
+    }
+
+
+def run_suite(repeat: int, top: int) -> Dict:
+    """Fastest of repeat measurements of every phase"""
+    baseline = {name for name, _, _, _ in import_times("pass")}
+    results = []
+    for phase, code in PHASES.items():
+        best = min((measure_phase(code, baseline) for _ in range(repeat)), key=lambda run: run['total_ms'])
+        best['slowest'] = best['slowest'][:top]
+        best.update(phase=phase, code=code, budget_ms=BUDGETS_MS.get(phase))
+        results.append(best)
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def format_result(run: Dict) -> str:
+    """Total against the budget, then the modules with the highest self time"""
+    budget = run['budget_ms']
+    verdict = "" if budget is None else f" / {budget:.0f} ms budget" + (" OVER" if run['total_ms'] > budget else "")
+    lines = [f"{run['phase']:<12} {run['total_ms']:8.1f} ms over {run['modules']} modules{verdict}"]
+    for module in run['slowest']:
+        lines.append(f"    {module['self_ms']:7.1f} ms self {module['cumulative_ms']:8.1f} ms cumulative  "
+                     f"{module['module']}")
+    return "\n".join(lines)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Startup import time benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per phase; the fastest is kept")
+    parser.add_argument("--top", type=int, default=8, help="slowest modules listed per phase")
+    parser.add_argument("--output", default=None, help="also write the results to this JSON file")
+    parser.add_argument("--no-budget", action="store_true", help="report only, never fail")
+    args = parser.parse_args(argv)
+
+    report = run_suite(max(1, args.repeat), args.top)
+    for run in report['results']:
+        print(format_result(run))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        print(f"Results written to {args.output}", file=sys.stderr)
+
+    over = [run['phase'] for run in report['results']
+            if run['budget_ms'] is not None and run['total_ms'] > run['budget_ms']]
+    if over and not args.no_budget:
+        print(f"Startup budget exceeded: {', '.join(over)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
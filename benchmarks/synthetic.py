@@ -0,0 +1,133 @@
+"""
+Deterministic synthetic source trees for benchmarks
+
+Usage:
+    python -m benchmarks.synthetic PROFILE DEST [--scale N] [--seed N]
+"""
+import argparse
+import os
+import random
+import sys
+from typing import Callable, Dict, List
+
+# Fragments combined into source lines; the same seed always gives the same tree
+WORDS = ["alpha", "beta", "gamma", "delta", "value", "result", "items", "config", "index", "buffer"]
+TEXT_EXTENSIONS = [".py", ".js", ".ts", ".md", ".json", ".css", ".html", ".txt"]
+BINARY_HEADERS = [b"\x89PNG\r\n\x1a\n", b"\x7fELF\x02\x01\x01", b"PK\x03\x04", b"%PDF-1.7\n"]
+
+
+def source_text(rng: random.Random, line_count: int) -> str:
+    """Plausible source lines with a little non-ASCII text mixed in"""
+    lines = []
+    for i in range(line_count):
+        a, b, c = rng.choice(WORDS), rng.choice(WORDS), rng.choice(WORDS)
+        if i % 40 == 39:
+            lines.append(f"# {a} → {b} ({c})\n")
+        else:
+            lines.append(f"{'    ' * (i % 3)}{a}_{i} = {b}({c}, {rng.randint(0, 9999)})\n")
+    return "".join(lines)
+
+
+def write_text_file(path: str, rng: random.Random, line_count: int):
+    """Write a UTF-8 text file of line_count lines"""
+    with open(path, "w", encoding="utf-8", newline="\n") as file:
+        file.write(source_text(rng, line_count))
+
+
+def write_binary_file(path: str, rng: random.Random, size: int):
+    """Write a file with a binary magic number and NUL bytes"""
+    with open(path, "wb") as file:
+        file.write(rng.choice(BINARY_HEADERS))
+        file.write(bytes(rng.getrandbits(8) for _ in range(min(size, 4096))))
+        if size > 4096:
+            file.write(b"\x00" * (size - 4096))
+
+
+def text_name(rng: random.Random, i: int) -> str:
+    """File name with a random text extension"""
+    return f"file_{i:05d}{rng.choice(TEXT_EXTENSIONS)}"
+
+
+def build_wide(root: str, rng: random.Random, scale: int):
+    """Many sibling folders, each with a few dozen medium files"""
+    for d in range(100 * scale):
+        folder = os.path.join(root, f"pkg_{d:04d}")
+        os.makedirs(folder)
+        for i in range(30):
+            write_text_file(os.path.join(folder, text_name(rng, i)), rng, rng.randint(20, 200))
+
+
+def build_deep(root: str, rng: random.Random, scale: int):
+    """One long chain of nested folders with a few files at every level"""
+    folder = root
+    for depth in range(150 * scale):
+        folder = os.path.join(folder, f"level_{depth:04d}")
+        os.makedirs(folder)
+        for i in range(4):
+            write_text_file(os.path.join(folder, text_name(rng, i)), rng, rng.randint(5, 60))
+
+
+def build_tiny(root: str, rng: random.Random, scale: int):
+    """Tens of thousands of one to three line files"""
+    for d in range(100):
+        folder = os.path.join(root, f"tiny_{d:03d}")
+        os.makedirs(folder)
+        for i in range(100 * scale):
+            write_text_file(os.path.join(folder, text_name(rng, i)), rng, rng.randint(1, 3))
+
+
+def build_huge(root: str, rng: random.Random, scale: int):
+    """A handful of multi-megabyte text files"""
+    block = source_text(rng, 2000)
+    for i in range(4 * scale):
+        path = os.path.join(root, f"huge_{i:02d}.txt")
+        with open(path, "w", encoding="utf-8", newline="\n") as file:
+            for _ in range(60):  # roughly 4 MB each
+                file.write(block)
+
+
+def build_binary(root: str, rng: random.Random, scale: int):
+    """Mostly binary assets with some text files in between"""
+    for d in range(20 * scale):
+        folder = os.path.join(root, f"assets_{d:03d}")
+        os.makedirs(folder)
+        for i in range(50):
+            if rng.random() < 0.7:
+                extension = rng.choice([".png", ".bin", ".dat", ".o"])
+                write_binary_file(os.path.join(folder, f"blob_{i:04d}{extension}"), rng, rng.randint(1024, 65536))
+            else:
+                write_text_file(os.path.join(folder, text_name(rng, i)), rng, rng.randint(10, 100))
+
+
+PROFILES: Dict[str, Callable[[str, random.Random, int], None]] = {
+    "wide": build_wide,
+    "deep": build_deep,
+    "tiny": build_tiny,
+    "huge": build_huge,
+    "binary": build_binary,
+}
+
+
+def generate(profile: str, dest: str, scale: int = 1, seed: int = 1234) -> str:
+    """Create the named synthetic tree under dest and return its path"""
+    root = os.path.join(dest, profile)
+    os.makedirs(root)
+    PROFILES[profile](root, random.Random(f"{seed}:{profile}"), scale)
+    return root
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic source tree")
+    parser.add_argument("profile", choices=sorted(PROFILES))
+    parser.add_argument("dest", help="folder to create the tree in")
+    parser.add_argument("--scale", type=int, default=1, help="multiply the tree size")
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args(argv)
+
+    root = generate(args.profile, args.dest, args.scale, args.seed)
+    print(root)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
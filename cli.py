@@ -0,0 +1,172 @@
+"""
+Headless command-line entry point (no Tk display or clipboard needed)
+
+Usage:
+    python cli.py tree PATH [--ignore PATTERNS] [--no-gitignore] [-o FILE]
+    python cli.py stats PATH [--ignore PATTERNS] [--no-gitignore] [--no-dedup] [--json] [-o FILE]
+    python cli.py dump PATH [--ignore PATTERNS] [--no-gitignore] [--no-dedup] [-o FILE]
+                            [--budget N [--budget-unit tokens|lines|bytes] [--strategy greedy|knapsack]]
+    python cli.py index stats|prune|clear [--index FILE] [--max-entries N]
+"""
+import argparse
+import json
+import os
+import sys
+from typing import List
+from models.file_manager import FileManager
+from models.folder_stats import format_stats_details
+from models.packing import PACK_UNITS, PACK_STRATEGIES
+from models.tokens import ESTIMATORS, create_token_estimator
+from utils.constants import (
+    DEFAULT_IGNORE_FOLDERS, LINE_COUNT_WORKERS, LINE_COUNT_EXECUTOR, TOKEN_ESTIMATOR,
+    PACK_DEFAULT_UNIT, PACK_DEFAULT_STRATEGY
+)
+
+
+def parse_ignore(value: str) -> List[str]:
+    """Split a comma separated ignore list"""
+    return [f.strip() for f in value.split(",") if f.strip()]
+
+
+def open_output(path: str):
+    """Open the output file, or stdout when no path is given"""
+    if path and path != "-":
+        return open(path, "w", encoding="utf-8")
+    if hasattr(sys.stdout, "reconfigure"):
+        sys.stdout.reconfigure(encoding="utf-8")
+    return sys.stdout
+
+
+def create_file_manager(args) -> FileManager:
+    """Build a FileManager from the common command-line options"""
+    index = None
+    if args.use_index:
+        from models.line_index import LineCountIndex
+        index = LineCountIndex.open_default()
+    return FileManager(index=index, workers=args.workers, executor_kind=args.executor,
+                       token_estimator=create_token_estimator(args.tokenizer))
+
+
+def format_stats(stats) -> str:
+    """Plain-text statistics report"""
+    report = f"""Total Files: {stats['total_files']:,}
+Total Lines of Code: {stats['total_lines']:,}
+Estimated Tokens: ~{stats['total_tokens']:,} ({stats['token_estimator']})
+Total Folders: {stats['folder_count']:,}
+Skipped Binary/Generated Files: {stats['skipped_files']:,} ({stats['skipped_bytes']:,} bytes)
+"""
+    report += format_stats_details(stats)
+    if stats.get('duplicate_files'):
+        report += (f"\nDuplicate Files: {stats['duplicate_files']:,} copies of {stats['duplicate_groups']:,} files "
+                   f"({stats['duplicate_bytes']:,} bytes, {stats['duplicate_lines']:,} lines)\n")
+    return report
+
+
+def run_tree(args, file_manager: FileManager, output):
+    """Write the ASCII tree and its total"""
+    snapshot = file_manager.scan_folder(args.path, args.ignore, use_gitignore=args.gitignore, dedup=False)
+    output.writelines(snapshot.iter_ascii_tree())
+    output.write(f"\n🎯 TOTAL LINES IN FOLDER: {snapshot.total_lines:,}\n")
+    output.write(f"🧮 ESTIMATED TOKENS: ~{snapshot.total_tokens:,} ({snapshot.token_estimator})\n")
+    output.write(f"📁 Folder: {args.path}\n")
+
+
+def run_stats(args, file_manager: FileManager, output):
+    """Write folder statistics as text or JSON"""
+    stats = file_manager.get_folder_stats(args.path, args.ignore, use_gitignore=args.gitignore, dedup=args.dedup)
+    if args.json:
+        json.dump(stats, output, indent=2, sort_keys=True)
+        output.write("\n")
+    else:
+        output.write(format_stats(stats))
+
+
+def run_dump(args, file_manager: FileManager, output):
+    """Stream the content of every text file, or of the files that fit --budget"""
+    snapshot = file_manager.scan_folder(args.path, args.ignore, use_gitignore=args.gitignore, dedup=args.dedup)
+    plan = None
+    if args.budget is not None:
+        plan = file_manager.plan_files_content(snapshot, args.budget, args.budget_unit, args.strategy)
+    file_count = file_manager.export_files_content(output.write, args.path, snapshot=snapshot, plan=plan,
+                                                   dedup=args.dedup)
+    print(f"{file_count} files written", file=sys.stderr)
+    if plan is not None:
+        print(f"{plan.describe()}; {plan.omitted:,} files omitted", file=sys.stderr)
+
+
+COMMANDS = {
+    "tree": run_tree,
+    "stats": run_stats,
+    "dump": run_dump,
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Command-line argument parser"""
+    parser = argparse.ArgumentParser(
+        prog="python cli.py",
+        description="ASCII file structure, line counts and code dumps without the GUI"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    for name, help_text in (("tree", "print the ASCII file structure"),
+                            ("stats", "print folder statistics"),
+                            ("dump", "print the content of every text file")):
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument("path", help="folder to scan")
+        sub.add_argument("--ignore", type=parse_ignore, default=parse_ignore(DEFAULT_IGNORE_FOLDERS),
+                         help="comma separated names or gitignore-style globs to ignore (default: %(default)s)")
+        sub.add_argument("--no-gitignore", dest="gitignore", action="store_false",
+                         help="do not honor .gitignore/.ignore files")
+        sub.add_argument("-o", "--output", default=None, help="write to FILE instead of stdout")
+        sub.add_argument("--workers", type=int, default=LINE_COUNT_WORKERS, help="line counting workers")
+        sub.add_argument("--executor", choices=["thread", "process"], default=LINE_COUNT_EXECUTOR)
+        sub.add_argument("--tokenizer", choices=sorted(ESTIMATORS), default=TOKEN_ESTIMATOR,
+                         help="token estimate: byte approximation or tiktoken if installed")
+        sub.add_argument("--use-index", action="store_true",
+                         help="read and update the persistent line count index")
+        if name != "tree":
+            sub.add_argument("--no-dedup", dest="dedup", action="store_false",
+                             help="do not detect files with identical content")
+        if name == "stats":
+            sub.add_argument("--json", action="store_true", help="machine readable output")
+        if name == "dump":
+            sub.add_argument("--budget", type=int, default=None,
+                             help="only dump the highest priority files that fit in N units")
+            sub.add_argument("--budget-unit", choices=PACK_UNITS, default=PACK_DEFAULT_UNIT)
+            sub.add_argument("--strategy", choices=PACK_STRATEGIES, default=PACK_DEFAULT_STRATEGY,
+                             help="greedy by priority, or knapsack maximizing total priority")
+
+    index_parser = subparsers.add_parser("index", help="inspect or prune the line count index")
+    index_parser.add_argument("index_args", nargs=argparse.REMAINDER)
+    return parser
+
+
+def main(argv: List[str] = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    if args.command == "index":
+        from models.line_index import main as index_main
+        return index_main(args.index_args)
+
+    if not os.path.isdir(args.path):
+        print(f"error: not a folder: {args.path}", file=sys.stderr)
+        return 2
+
+    file_manager = create_file_manager(args)
+    output = open_output(args.output)
+    try:
+        COMMANDS[args.command](args, file_manager, output)
+    except BrokenPipeError:
+        # Downstream command (e.g. head) closed the pipe early
+        sys.stderr.close()
+        return 1
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        file_manager.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
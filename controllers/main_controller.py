@@ -2,11 +2,16 @@
 Main application controller
 """
 import os
-import pyperclip
 from models.file_manager import FileManager
 from views.main_window import MainWindow
+from utils.background import BackgroundTask
+from utils.instrumentation import instrumentation
 from utils.theme import ModernTheme
-from utils.constants import STATUS_READY, STATUS_LOADING, STATUS_REFRESHING, STATUS_COPYING
+from utils.constants import (
+    STATUS_READY, STATUS_LOADING, STATUS_REFRESHING, STATUS_COPYING,
+    STATUS_EXPORTING, STATUS_CANCELLING, STATUS_CANCELLED, CLIPBOARD_MAX_BYTES,
+    WATCH_POLL_INTERVAL_MS, WATCH_MAX_INCREMENTAL_CHANGES, WATCH_MAX_WASTED_ROWS, IGNORE_FILE_NAMES
+)
 
 class MainController:
     def __init__(self, root):
@@ -20,6 +25,88 @@ class MainController:
         # Initialize state
         self.current_folder = None
         self.current_ignore_folders = []
+        self.current_use_gitignore = True
+        self.current_snapshot = None
+        self.current_task = None
+        self.watch_enabled = False
+        self.watcher = None
+        self.watch_job = None
+        
+        # The persistent index (sqlite) is opened once the window is on screen
+        self.root.after_idle(self.open_line_index)
+    
+    def open_line_index(self):
+        """Attach the persistent line count index to the file manager"""
+        from models.line_index import LineCountIndex
+        self.file_manager.index = LineCountIndex.open_default()
+    
+    def copy_to_clipboard(self, text):
+        """Put text on the system clipboard; pyperclip is only imported on first use"""
+        import pyperclip
+        pyperclip.copy(text)
+    
+    def run_in_background(self, work, on_done, error_prefix, operation=None):
+        """Run work(task) on a worker thread, replacing any task already running
+
+        When instrumentation is on, the work and on_done are recorded as operation. The
+        record is ended before on_done runs, so an operation begun by on_done is not cut short.
+        """
+        if self.current_task and self.current_task.running:
+            self.current_task.cancel()
+        record = instrumentation.begin(operation) if operation else None
+        
+        def profiled_work(task):
+            with instrumentation.profiled():
+                return work(task)
+        
+        # Callbacks of a task that has since been replaced are ignored
+        def on_progress(progress):
+            if task is self.current_task:
+                self.view.update_progress(progress.describe())
+        
+        def on_error(e):
+            if task is self.current_task:
+                if operation:
+                    instrumentation.end()
+                self.view.set_busy(False)
+                self.update_status(f"❌ {error_prefix}: {str(e)}", self.theme.TEXT_ERROR)
+        
+        def on_cancel():
+            if task is self.current_task:
+                if operation:
+                    instrumentation.end()
+                self.view.set_busy(False)
+                self.view.update_progress("")
+                self.update_status(STATUS_CANCELLED, self.theme.TEXT_SECONDARY)
+                self.root.after(3000, lambda: self.update_status(STATUS_READY))
+        
+        def on_success(result):
+            if task is not self.current_task:
+                return
+            self.view.set_busy(False)
+            if operation:
+                instrumentation.end()
+            try:
+                with instrumentation.resumed(record), instrumentation.profiled():
+                    on_done(result)
+            except Exception as e:
+                on_error(e)
+        
+        task = BackgroundTask(
+            self.root, profiled_work, on_success,
+            on_progress=on_progress,
+            on_error=on_error,
+            on_cancel=on_cancel
+        )
+        self.current_task = task
+        self.view.set_busy(True)
+        task.start()
+    
+    def cancel_task(self):
+        """Cancel the running background task, if any"""
+        if self.current_task and self.current_task.running:
+            self.current_task.cancel()
+            self.update_status(STATUS_CANCELLING, self.theme.TEXT_ACCENT)
     
     def load_folder(self, folder_path):
         """Load and display folder structure"""
@@ -28,27 +115,113 @@ class MainController:
             return
         
         self.update_status(STATUS_LOADING, self.theme.TEXT_ACCENT)
-        self.root.update_idletasks()
         
+        self.current_folder = folder_path
+        self.current_ignore_folders = self.view.get_header_panel().get_ignore_folders()
+        self.current_use_gitignore = self.view.get_header_panel().get_use_gitignore()
+        self.current_snapshot = None
+        self.stop_watching()
+        ignore_folders = list(self.current_ignore_folders)
+        use_gitignore = self.current_use_gitignore
+        
+        # Scan once on a worker thread, then render every panel from the same snapshot
+        def work(task):
+            return self.file_manager.scan_folder(
+                folder_path, ignore_folders,
+                progress_callback=task.report,
+                cancel_event=task.cancel_event,
+                use_gitignore=use_gitignore
+            )
+        
+        self.run_in_background(work, self._on_folder_scanned, "Error loading folder", "Load folder")
+    
+    def _on_folder_scanned(self, snapshot):
+        """Render a finished scan into the panels"""
         try:
-            self.current_folder = folder_path
-            self.current_ignore_folders = self.view.get_header_panel().get_ignore_folders()
+            self.current_snapshot = snapshot
             
             # Update all panels
-            self.view.get_tree_panel().populate_tree(folder_path, self.current_ignore_folders)
-            self.view.get_buttons_panel().populate_buttons(folder_path, self.current_ignore_folders)
-            self.view.get_ascii_panel().display_ascii_tree(folder_path, self.current_ignore_folders)
+            with instrumentation.phase("ui/tree panel"):
+                self.view.get_tree_panel().populate_tree(self.current_snapshot)
+            with instrumentation.phase("ui/buttons panel"):
+                self.view.get_buttons_panel().populate_buttons(self.current_snapshot)
+            with instrumentation.phase("ui/ascii panel"):
+                self.view.get_ascii_panel().display_ascii_tree(self.current_snapshot)
             
-            # Get folder stats for progress
-            stats = self.file_manager.get_folder_stats(folder_path, self.current_ignore_folders)
-            self.view.update_progress(f"{stats['total_files']} files, {stats['total_lines']:,} lines")
+            # Running totals only: the full statistics are computed on the worker by show_statistics
+            self.view.update_progress(f"{snapshot.total_files} files, {snapshot.total_lines:,} lines, ~{snapshot.total_tokens:,} tokens")
             
             self.update_status("✅ Folder loaded successfully!", self.theme.TEXT_SUCCESS)
             self.root.after(3000, lambda: self.update_status(STATUS_READY))
             
+            if self.watch_enabled:
+                self.start_watching()
+            
         except Exception as e:
             self.update_status(f"❌ Error loading folder: {str(e)}", self.theme.TEXT_ERROR)
     
+    def set_watch_enabled(self, enabled):
+        """Turn automatic refresh of changed folders on or off"""
+        self.watch_enabled = enabled
+        if enabled and self.current_snapshot is not None:
+            self.start_watching()
+        elif not enabled:
+            self.stop_watching()
+    
+    def start_watching(self):
+        """Watch the current snapshot's folders for changes"""
+        from models.watcher import create_watcher  # only needed once watch mode is used
+        self.stop_watching()
+        self.watcher = create_watcher(self.current_snapshot)
+        self.watch_job = self.root.after(WATCH_POLL_INTERVAL_MS, self._poll_watcher)
+    
+    def stop_watching(self):
+        """Stop watching and release the watcher"""
+        if self.watch_job is not None:
+            self.root.after_cancel(self.watch_job)
+            self.watch_job = None
+        if self.watcher is not None:
+            self.watcher.close()
+            self.watcher = None
+    
+    def _poll_watcher(self):
+        """Apply pending filesystem changes to the snapshot and the panels"""
+        self.watch_job = None
+        if self.watcher is None or self.current_snapshot is None:
+            return
+        
+        # Leave the snapshot alone while a background task may be reading it
+        if not (self.current_task and self.current_task.running):
+            changed = self.watcher.poll()
+            rules_changed = any(os.path.basename(path) in IGNORE_FILE_NAMES for path in changed)
+            wasted = self.current_snapshot.table.wasted_fraction > WATCH_MAX_WASTED_ROWS
+            if self.watcher.overflowed or rules_changed or wasted or len(changed) > WATCH_MAX_INCREMENTAL_CHANGES:
+                self.load_folder(self.current_folder)
+                return
+            if changed:
+                try:
+                    self._apply_changes(changed)
+                except Exception:
+                    # The snapshot may be half updated and the events are used up: reload it
+                    self.load_folder(self.current_folder)
+                    return
+        
+        self.watch_job = self.root.after(WATCH_POLL_INTERVAL_MS, self._poll_watcher)
+    
+    def _apply_changes(self, changed):
+        """Rescan only the folders containing changed paths and patch each panel"""
+        snapshot = self.current_snapshot
+        result = self.file_manager.apply_changes(snapshot, changed)
+        if not result:
+            return
+        
+        self.watcher.track_folders(result.relisted)
+        self.view.get_tree_panel().update_folders(result.relisted)
+        self.view.get_buttons_panel().update_folders(snapshot, result)
+        self.view.get_ascii_panel().update_folders(snapshot, result)
+        
+        self.view.update_progress(f"{snapshot.total_files} files, {snapshot.total_lines:,} lines, ~{snapshot.total_tokens:,} tokens")
+    
     def refresh_display(self):
         """Refresh the current display"""
         if not self.current_folder:
@@ -71,7 +244,7 @@ class MainController:
             formatted_content += "// " + "="*78 + "\n\n"
             formatted_content += content
             
-            pyperclip.copy(formatted_content)
+            self.copy_to_clipboard(formatted_content)
             self.update_status(f"✅ {file_name} copied to clipboard!", self.theme.TEXT_SUCCESS)
             self.root.after(3000, lambda: self.update_status(STATUS_READY))
             
@@ -79,36 +252,96 @@ class MainController:
             self.update_status(f"❌ Error copying file: {str(e)}", self.theme.TEXT_ERROR)
     
     def copy_all_files(self):
-        """Copy all files content to clipboard"""
+        """Copy all files content to clipboard, or save it to a file if it is too big"""
         if not self.current_folder:
             self.update_status("❌ No folder selected", self.theme.TEXT_ERROR)
             return
         
+        try:
+            budget = self.view.get_header_panel().get_budget()
+        except ValueError:
+            self.update_status("❌ Budget must be a positive whole number", self.theme.TEXT_ERROR)
+            return
+        
         self.update_status(STATUS_COPYING, self.theme.TEXT_ACCENT)
-        self.root.update_idletasks()
         
-        try:
-            content, file_count = self.file_manager.get_all_files_content(
-                self.current_folder, self.current_ignore_folders
+        folder_path = self.current_folder
+        ignore_folders = list(self.current_ignore_folders)
+        use_gitignore = self.current_use_gitignore
+        snapshot = self.current_snapshot
+        
+        def work(task):
+            scanned = snapshot or self.file_manager.scan_folder(
+                folder_path, ignore_folders, cancel_event=task.cancel_event, use_gitignore=use_gitignore
             )
-            
-            if content:
-                pyperclip.copy(content)
-                self.update_status(f"✅ {file_count} files copied to clipboard!", self.theme.TEXT_SUCCESS)
+            plan = None
+            if budget is not None:
+                plan = self.file_manager.plan_files_content(scanned, *budget)
+                export_bytes = sum(entry.size for entry in plan.selected)
             else:
-                self.update_status("❌ No files to copy", self.theme.TEXT_ERROR)
-            
+                export_bytes = scanned.exportable_bytes()
+            if export_bytes > CLIPBOARD_MAX_BYTES:
+                return scanned, None, plan
+            return scanned, self.file_manager.get_all_files_content(
+                folder_path, ignore_folders, scanned, cancel_event=task.cancel_event, plan=plan
+            ), plan
+        
+        self.run_in_background(work, self._on_files_content_ready, "Error copying files", "Copy all files")
+    
+    def _on_files_content_ready(self, result):
+        """Put the collected file contents on the clipboard"""
+        snapshot, collected, plan = result
+        if collected is None:
+            self.save_all_files(snapshot, plan)
+            return
+        
+        content, file_count = collected
+        if content:
+            with instrumentation.phase("clipboard"):
+                self.copy_to_clipboard(content)
+            if plan is not None:
+                self.update_status(f"✅ {file_count} of {plan.candidates} files copied "
+                                   f"({plan.used:,} / {plan.limit:,} {plan.unit})", self.theme.TEXT_SUCCESS)
+            else:
+                self.update_status(f"✅ {file_count} files copied to clipboard!", self.theme.TEXT_SUCCESS)
+        else:
+            self.update_status("❌ No files to copy", self.theme.TEXT_ERROR)
+        
+        self.root.after(3000, lambda: self.update_status(STATUS_READY))
+    
+    def save_all_files(self, snapshot, plan=None):
+        """Stream all files content, or the files of a packing plan, into a file chosen by the user"""
+        if plan is not None:
+            size_mb = sum(entry.size for entry in plan.selected) / (1024 * 1024)
+        else:
+            size_mb = snapshot.exportable_bytes() / (1024 * 1024)
+        export_path = self.view.ask_export_path(size_mb)
+        if not export_path:
+            self.update_status("❌ Export cancelled", self.theme.TEXT_ERROR)
             self.root.after(3000, lambda: self.update_status(STATUS_READY))
-            
-        except Exception as e:
-            self.update_status(f"❌ Error copying files: {str(e)}", self.theme.TEXT_ERROR)
+            return
+        
+        self.update_status(STATUS_EXPORTING, self.theme.TEXT_ACCENT)
+        folder_path = snapshot.folder_path
+        
+        def work(task):
+            with open(export_path, "w", encoding="utf-8") as export_file:
+                return self.file_manager.export_files_content(
+                    export_file.write, folder_path, snapshot=snapshot, cancel_event=task.cancel_event, plan=plan
+                )
+        
+        def on_done(file_count):
+            self.update_status(f"✅ {file_count} files saved to {os.path.basename(export_path)}!", self.theme.TEXT_SUCCESS)
+            self.root.after(3000, lambda: self.update_status(STATUS_READY))
+        
+        self.run_in_background(work, on_done, "Error saving files", "Save all files")
     
     def copy_ascii_tree(self):
         """Copy ASCII tree to clipboard"""
         try:
             content = self.view.get_ascii_panel().get_content()
             if content.strip():
-                pyperclip.copy(content)
+                self.copy_to_clipboard(content)
                 self.update_status("✅ ASCII tree copied to clipboard!", self.theme.TEXT_SUCCESS)
                 self.root.after(3000, lambda: self.update_status(STATUS_READY))
             else:
@@ -122,11 +355,63 @@ class MainController:
             self.update_status("❌ No folder selected", self.theme.TEXT_ERROR)
             return
         
+        folder_path = self.current_folder
+        ignore_folders = list(self.current_ignore_folders)
+        use_gitignore = self.current_use_gitignore
+        snapshot = self.current_snapshot
+        
+        # A loaded snapshot skips the scan; duplicate detection still runs on the worker thread
+        def work(task):
+            return self.file_manager.get_folder_stats(
+                folder_path, ignore_folders, snapshot,
+                progress_callback=task.report,
+                cancel_event=task.cancel_event,
+                use_gitignore=use_gitignore
+            )
+        
+        self.run_in_background(work, self._show_statistics_dialog, "Error generating statistics", "Show statistics")
+    
+    def _show_statistics_dialog(self, stats):
+        """Show statistics together with line count cache counters"""
+        stats['cache'] = self.file_manager.get_cache_stats()
+        ascii_buffer = self.view.get_ascii_panel().buffer
+        if stats.get('tree_rows') and ascii_buffer is not None:
+            stats['ascii_lines'] = len(ascii_buffer)
+            stats['ascii_bytes'] = ascii_buffer.nbytes
+        self.view.show_statistics_dialog(stats)
+    
+    def show_diagnostics(self):
+        """Show timings and counters of the last recorded operation"""
+        self.view.show_diagnostics_dialog(instrumentation.format_report(),
+                                          instrumentation.enabled, instrumentation.profile)
+    
+    def set_instrumentation(self, enabled, profile):
+        """Turn timing instrumentation and cProfile collection on or off"""
+        instrumentation.enabled = enabled or profile
+        instrumentation.profile = profile
+    
+    def save_profile(self):
+        """Save cProfile data of the last recorded operation as a pstats file"""
+        if instrumentation.last is None or instrumentation.last.profiler is None:
+            self.update_status("❌ No profile recorded; enable cProfile and repeat the operation", self.theme.TEXT_ERROR)
+            return
+        
+        profile_path = self.view.ask_profile_path()
+        if not profile_path:
+            return
         try:
-            stats = self.file_manager.get_folder_stats(self.current_folder, self.current_ignore_folders)
-            self.view.show_statistics_dialog(stats)
+            instrumentation.dump_profile(profile_path)
+            self.update_status(f"✅ Profile saved to {os.path.basename(profile_path)}", self.theme.TEXT_SUCCESS)
+            self.root.after(3000, lambda: self.update_status(STATUS_READY))
         except Exception as e:
-            self.update_status(f"❌ Error generating statistics: {str(e)}", self.theme.TEXT_ERROR)
+            self.update_status(f"❌ Error saving profile: {str(e)}", self.theme.TEXT_ERROR)
+    
+    def shutdown(self):
+        """Stop background work and release worker pools and the index"""
+        if self.current_task and self.current_task.running:
+            self.current_task.cancel()
+        self.stop_watching()
+        self.file_manager.close()
     
     def update_status(self, message, color=None):
         """Update status bar"""
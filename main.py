@@ -2,13 +2,24 @@
 File Structure Viewer v3.0
 Modern MVC Architecture Implementation
 """
+import sys
 import tkinter as tk
-from controllers.main_controller import MainController
+from views.splash import show_splash
 
 def main():
     root = tk.Tk()
+    splash = show_splash(root)
+
+    # Imported after the first frame is on screen: the controller pulls in the models and every panel
+    from controllers.main_controller import MainController
     app = MainController(root)
+    splash.destroy()
     root.mainloop()
+    app.shutdown()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if getattr(sys, "frozen", False):
+        # Needed for process-pool line counting in frozen executables
+        import multiprocessing
+        multiprocessing.freeze_support()
+    main()
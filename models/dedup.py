@@ -0,0 +1,55 @@
+"""
+Duplicate file detection: only files sharing a size are hashed and compared
+"""
+from collections import Counter
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from models.scanner import ScanEntry
+
+
+def new_content_hash():
+    """Hash object for file bodies; blake2b is fast and ships with Python"""
+    import hashlib  # not needed at startup
+    return hashlib.blake2b(digest_size=16)
+
+
+class DuplicateFinder:
+    """Remembers the first file seen with each body; sizes seen once are never hashed"""
+
+    def __init__(self, files: Iterable[ScanEntry]):
+        sizes = Counter(entry.size for entry in files)
+        self.candidate_sizes = {size for size, count in sizes.items() if count > 1}
+        self.first: Dict[Tuple[int, bytes], ScanEntry] = {}
+
+    def is_candidate(self, entry: ScanEntry) -> bool:
+        """Whether another file has the same size"""
+        return entry.size in self.candidate_sizes
+
+    def original_of(self, entry: ScanEntry, digest: bytes) -> Optional[ScanEntry]:
+        """Earlier file with the same body, or None after recording entry as the first one"""
+        key = (entry.size, digest)
+        original = self.first.get(key)
+        if original is None:
+            self.first[key] = entry
+        return original
+
+
+def duplicate_stats(files: Iterable[ScanEntry], digest_of: Callable[[ScanEntry], bytes]) -> Dict:
+    """Counts of redundant copies: every file after the first with the same body"""
+    files = [entry for entry in files if entry.lines > 0]
+    finder = DuplicateFinder(files)
+    stats = {'duplicate_files': 0, 'duplicate_bytes': 0, 'duplicate_lines': 0, 'duplicate_groups': 0}
+    grouped = set()
+
+    for entry in files:
+        if not finder.is_candidate(entry):
+            continue
+        original = finder.original_of(entry, digest_of(entry))
+        if original is None:
+            continue
+        stats['duplicate_files'] += 1
+        stats['duplicate_bytes'] += entry.size
+        stats['duplicate_lines'] += entry.lines
+        if original not in grouped:
+            grouped.add(original)
+            stats['duplicate_groups'] += 1
+    return stats
@@ -1,64 +1,288 @@
 """
 File management and processing logic
 """
+import codecs
 import os
-from typing import List, Tuple, Dict
+from typing import Collection, List, Tuple, Dict, Iterator, Callable, Optional, TYPE_CHECKING
+from utils.constants import (
+    LINE_CACHE_MAX_ENTRIES, LINE_COUNT_WORKERS, LINE_COUNT_EXECUTOR, LINE_COUNT_PARALLEL_MIN_FILES,
+    READ_CHUNK_SIZE, MAX_TEXT_FILE_SIZE, BINARY_SNIFF_BYTES, BINARY_EXTENSIONS, BINARY_MAGIC_NUMBERS,
+    GENERATED_FILE_NAMES, GENERATED_FILE_SUFFIXES, USE_GITIGNORE, PACK_DEFAULT_UNIT, PACK_DEFAULT_STRATEGY,
+    DEDUP_FILES
+)
+from models.line_cache import LineCountCache, Signature, file_signature
+from models.tokens import TokenEstimator, create_token_estimator
+from models.scanner import FolderScanner, FolderSnapshot, RescanResult, ScanCancelled, ScanEntry
+from models.packing import PackingPlan, plan_pack
+from models.dedup import DuplicateFinder, duplicate_stats, new_content_hash
+from utils.instrumentation import instrumentation
+
+if TYPE_CHECKING:
+    from models.line_index import LineCountIndex
+
+# Cached line count of a file classified as binary or generated
+BINARY_FILE = -1
+
+# (lines, estimated tokens) of one file
+FileCounts = Tuple[int, int]
+
+# (lines, estimated tokens, content digest or None) of one file
+FileCountsDigest = Tuple[int, int, Optional[bytes]]
+
+# Written after every file of an export
+EXPORT_SEPARATOR = "\n\n" + "="*80 + "\n\n"
+
+def is_skipped_by_name(file_path: str, size: int) -> bool:
+    """Classify a file as binary/generated from its name and size alone"""
+    if size > MAX_TEXT_FILE_SIZE:
+        return True
+    
+    name = os.path.basename(file_path).lower()
+    if name in GENERATED_FILE_NAMES or name.endswith(GENERATED_FILE_SUFFIXES):
+        return True
+    return os.path.splitext(name)[1] in BINARY_EXTENSIONS
+
+def is_binary_header(header: bytes) -> bool:
+    """Sniff the first bytes of a file for NUL bytes or a binary magic number"""
+    return b"\x00" in header[:BINARY_SNIFF_BYTES] or header.startswith(BINARY_MAGIC_NUMBERS)
+
+def count_file(file_path: str, size: int = 0, estimator: TokenEstimator = None) -> FileCounts:
+    """Count lines and estimate tokens in one pass over binary chunks"""
+    return count_file_digest(file_path, size, estimator)[:2]
+
+def count_file_digest(file_path: str, size: int = 0, estimator: TokenEstimator = None,
+                      digest: bool = False) -> FileCountsDigest:
+    """count_file, also hashing the raw bytes during the same read when digest is set"""
+    # Lines are counted like text-mode UTF-8 iteration: \n, \r\n and a lone \r
+    # each end a line (universal newlines), a final unterminated line counts,
+    # and non-UTF-8 files count as 0 lines and 0 tokens.
+    # Binary and generated files return (BINARY_FILE, 0) after reading at most
+    # BINARY_SNIFF_BYTES; they and unreadable files get no digest.
+    # Module level so process pools can pickle it.
+    if is_skipped_by_name(file_path, size):
+        return BINARY_FILE, 0, None
+    
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    needs_text = estimator is not None and estimator.needs_text
+    lines = 0
+    tokens = 0
+    byte_count = 0
+    last_byte = b""
+    pending_cr = False
+    content_hash = new_content_hash() if digest else None
+
+    try:
+        with open(file_path, "rb") as file:
+            # Sniff the header before the bulk reads, so a binary is never read in full
+            chunk = file.read(BINARY_SNIFF_BYTES)
+            if is_binary_header(chunk):
+                return BINARY_FILE, 0, None
+
+            while chunk:
+                if content_hash is not None:
+                    content_hash.update(chunk)
+                # Validate UTF-8; pure ASCII chunks need no decoding at all
+                if not chunk.isascii() or decoder.getstate()[0]:
+                    text = decoder.decode(chunk)
+                elif needs_text:
+                    text = chunk.decode("ascii")
+                if needs_text:
+                    tokens += estimator.count_text(text)
+
+                byte_count += len(chunk)
+                lines += chunk.count(b"\n")
+                carriage_returns = chunk.count(b"\r")
+                if carriage_returns:
+                    lines += carriage_returns - chunk.count(b"\r\n")
+                if pending_cr and chunk[:1] == b"\n":
+                    lines -= 1
+
+                pending_cr = chunk[-1:] == b"\r"
+                last_byte = chunk[-1:]
+                chunk = file.read(READ_CHUNK_SIZE)
+
+            decoder.decode(b"", final=True)
+    except (UnicodeDecodeError, OSError):
+        return 0, 0, None
+
+    if last_byte and last_byte not in (b"\n", b"\r"):
+        lines += 1
+    if estimator is not None and not needs_text:
+        tokens = estimator.count_bytes(byte_count)
+    return lines, tokens, content_hash.digest() if content_hash is not None else None
 
 class FileManager:
-    def __init__(self):
-        self.file_cache = {}
+    def __init__(self, cache_max_entries: int = LINE_CACHE_MAX_ENTRIES, index: "LineCountIndex" = None,
+                 workers: int = LINE_COUNT_WORKERS, executor_kind: str = LINE_COUNT_EXECUTOR,
+                 token_estimator: TokenEstimator = None):
+        self.file_cache = LineCountCache(cache_max_entries)
+        self.index = index
+        self.workers = workers
+        self.executor_kind = executor_kind
+        self.token_estimator = token_estimator or create_token_estimator()
+        # Content digests of files that share their size with another file, keyed like the line cache
+        self.digest_cache = LineCountCache(cache_max_entries)
+        self._executor = None
     
-    def count_lines_of_code(self, file_path: str) -> int:
-        """Count lines of code in a file with caching"""
-        if file_path in self.file_cache:
-            return self.file_cache[file_path]
-        
+    def count_lines_of_code(self, file_path: str, st: os.stat_result = None) -> int:
+        """Count lines of code in a file, re-reading it only when it changed"""
+        return self.count_file(file_path, st)[0]
+    
+    def count_file(self, file_path: str, st: os.stat_result = None) -> FileCounts:
+        """Lines and estimated tokens of a file (0 for binary files), re-reading it only when it changed"""
         try:
-            with open(file_path, "r", encoding="utf-8") as file:
-                lines = sum(1 for line in file)
-                self.file_cache[file_path] = lines
-                return lines
-        except (UnicodeDecodeError, PermissionError, FileNotFoundError):
-            self.file_cache[file_path] = 0
-            return 0
-    
-    def generate_ascii_tree(self, folder_path: str, ignore_folders: List[str] = None, indent: str = "") -> Tuple[str, int]:
-        """Generate ASCII tree representation of folder structure"""
-        if ignore_folders is None:
-            ignore_folders = []
+            if st is None:
+                st = os.stat(file_path)
+        except OSError:
+            return 0, 0
         
-        tree = ""
-        total_lines = 0
+        signature = file_signature(st)
+        counts = self._get_cached_count(file_path, signature)
+        if counts is None:
+            counts = count_file(file_path, st.st_size, self.token_estimator)
+            self._store_count(file_path, signature, counts)
+        return max(counts[0], 0), counts[1]
+    
+    def count_lines_many(self, file_paths: List[str], stats: List[os.stat_result] = None) -> List[int]:
+        """Count lines of many files, reading cache misses on the worker pool"""
+        return [max(lines, 0) for lines, _ in self.count_files_many(file_paths, stats)]
+    
+    def count_files_many(self, file_paths: List[str], stats: List[os.stat_result] = None,
+                         digest_sizes: Collection[int] = ()) -> List[FileCounts]:
+        """(lines, tokens) of many files from one read each; binary/generated files have BINARY_FILE lines
+
+        Files read with a size in digest_sizes are hashed during that read for duplicate detection.
+        """
+        if stats is None:
+            stats = [self._stat_or_none(path) for path in file_paths]
         
+        results = [(0, 0)] * len(file_paths)
+        misses = []
+        for i, (file_path, st) in enumerate(zip(file_paths, stats)):
+            if st is None:
+                continue
+            signature = file_signature(st)
+            counts = self._get_cached_count(file_path, signature)
+            if counts is None:
+                misses.append((i, file_path, signature))
+            else:
+                results[i] = counts
+        
+        if misses:
+            instrumentation.count("files read", len(misses))
+            all_counts = self._map_count_file(
+                [file_path for _, file_path, _ in misses],
+                [signature[0] for _, _, signature in misses],
+                [signature[0] in digest_sizes for _, _, signature in misses]
+            )
+            for (i, file_path, signature), (lines, tokens, digest) in zip(misses, all_counts):
+                results[i] = lines, tokens
+                self._store_count(file_path, signature, (lines, tokens))
+                if digest is not None:
+                    self.digest_cache.put(file_path, signature, digest)
+        
+        return results
+    
+    def _stat_or_none(self, file_path: str):
+        """stat() a path, returning None if it cannot be read"""
         try:
-            items = os.listdir(folder_path)
-        except PermissionError:
-            return "Permission denied", 0
+            return os.stat(file_path)
+        except OSError:
+            return None
+    
+    def _get_cached_count(self, file_path: str, signature) -> FileCounts:
+        """Look counts up in the memory cache, then the persistent index"""
+        counts = self.file_cache.get(file_path, signature)
+        if counts is not None:
+            return counts
         
-        # Filter ignored folders and sort items
-        items = [item for item in items if item not in ignore_folders]
-        items.sort(key=lambda x: (os.path.isfile(os.path.join(folder_path, x)), x.lower()))
+        if self.index is not None:
+            counts = self.index.get(file_path, signature, self.token_estimator.name)
+            if counts is not None:
+                self.file_cache.put(file_path, signature, counts)
+        return counts
+    
+    def _store_count(self, file_path: str, signature, counts: FileCounts):
+        """Record freshly read counts in the memory cache and persistent index"""
+        self.file_cache.put(file_path, signature, counts)
+        if self.index is not None:
+            self.index.put(file_path, signature, counts, self.token_estimator.name)
+    
+    def _map_count_file(self, file_paths: List[str], sizes: List[int], digests: List[bool]) -> List[FileCountsDigest]:
+        """Count lines and tokens of file_paths serially or across the worker pool"""
+        estimator = self.token_estimator
+        if self.workers <= 1 or len(file_paths) < LINE_COUNT_PARALLEL_MIN_FILES:
+            return [count_file_digest(file_path, size, estimator, digest)
+                    for file_path, size, digest in zip(file_paths, sizes, digests)]
         
-        for i, item in enumerate(items):
-            item_path = os.path.join(folder_path, item)
-            is_last = i == len(items) - 1
-            
-            if os.path.isdir(item_path):
-                connector = "└── " if is_last else "├── "
-                next_indent = indent + ("    " if is_last else "│   ")
-                
-                subtree, subtree_lines = self.generate_ascii_tree(item_path, ignore_folders, next_indent)
-                
-                tree += f"{indent}{connector}📁 {item} 🔢({subtree_lines} total lines)\n{subtree}"
-                total_lines += subtree_lines
+        chunksize = 1
+        if self.executor_kind == "process":
+            chunksize = max(1, len(file_paths) // (self.workers * 4))
+        return list(self._get_executor().map(
+            count_file_digest, file_paths, sizes, [estimator] * len(file_paths), digests, chunksize=chunksize
+        ))
+    
+    def _get_executor(self):
+        """Create the worker pool on first use"""
+        if self._executor is None:
+            # Imported lazily: concurrent.futures pulls in multiprocessing at import time
+            from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
             else:
-                lines_of_code = self.count_lines_of_code(item_path)
-                total_lines += lines_of_code
-                connector = "└── " if is_last else "├── "
-                
-                tree += f"{indent}{connector}📄 {item} 📊({lines_of_code} lines)\n"
-        
-        return tree, total_lines
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="line-count")
+        return self._executor
+    
+    def close(self):
+        """Shut down the worker pool and flush the persistent index"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        if self.index is not None:
+            self.index.close()
+    
+    def flush_index(self):
+        """Persist line counts gathered since the last flush"""
+        if self.index is not None:
+            self.index.flush()
+    
+    def get_cache_stats(self) -> Dict:
+        """Get line count cache counters"""
+        stats = self.file_cache.get_stats()
+        if self.index is not None:
+            stats['index'] = self.index.get_stats()
+        return stats
+    
+    def scan_folder(self, folder_path: str, ignore_folders: List[str] = None,
+                    progress_callback=None, cancel_event=None, use_gitignore: bool = USE_GITIGNORE,
+                    dedup: bool = DEDUP_FILES) -> FolderSnapshot:
+        """Scan a folder once into a snapshot shared by every view
+
+        ignore_folders holds names or gitignore-style globs; with use_gitignore the
+        .gitignore/.ignore files found along the way are honored too. With dedup,
+        files that share a size are hashed during the read that counts them.
+        """
+        scanner = FolderScanner(self, progress_callback, cancel_event, dedup=dedup)
+        try:
+            with instrumentation.phase("scan"):
+                return scanner.scan(folder_path, ignore_folders, use_gitignore)
+        finally:
+            with instrumentation.phase("scan/flush index"):
+                self.flush_index()
+    
+    def apply_changes(self, snapshot: FolderSnapshot, changed_paths) -> RescanResult:
+        """Update a snapshot for changed paths, re-counting only files that changed"""
+        try:
+            return FolderScanner(self).rescan(snapshot, changed_paths)
+        finally:
+            self.flush_index()
+    
+    def generate_ascii_tree(self, folder_path: str, ignore_folders: List[str] = None, snapshot: FolderSnapshot = None) -> Tuple[str, int]:
+        """Generate ASCII tree representation of folder structure"""
+        if snapshot is None:
+            snapshot = self.scan_folder(folder_path, ignore_folders, dedup=False)
+        with instrumentation.phase("ascii tree"):
+            return snapshot.to_ascii_tree()
     
     def get_file_content(self, file_path: str) -> str:
         """Get content of a file"""
@@ -68,61 +292,162 @@ class FileManager:
         except Exception as e:
             return f"Error reading file: {str(e)}"
     
-    def get_all_files_content(self, folder_path: str, ignore_folders: List[str] = None) -> Tuple[str, int]:
-        """Get content of all files in folder"""
-        if ignore_folders is None:
-            ignore_folders = []
+    def iter_file_content(self, file_path: str) -> Iterator[str]:
+        """Yield the content of a file in chunks"""
+        try:
+            with open(file_path, "r", encoding="utf-8") as file:
+                while True:
+                    chunk = file.read(READ_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    yield chunk
+        except Exception as e:
+            yield f"Error reading file: {str(e)}"
+    
+    def export_files_content(self, write: Callable[[str], object], folder_path: str, ignore_folders: List[str] = None,
+                             snapshot: FolderSnapshot = None, cancel_event=None, plan: PackingPlan = None,
+                             dedup: bool = DEDUP_FILES) -> int:
+        """Stream the content of all files in folder to write(), reading each file once
+
+        With a packing plan only the planned files are read, followed by a summary line.
+        With dedup a body already written is replaced by a reference to its first copy.
+        """
+        if snapshot is None:
+            snapshot = self.scan_folder(folder_path, ignore_folders, cancel_event=cancel_event, dedup=dedup)
         
-        file_contents = ""
         file_count = 0
+        files = [entry for entry in (plan.selected if plan is not None else snapshot.iter_files()) if entry.lines > 0]
+        finder = DuplicateFinder(files) if dedup else None
         
-        for root, dirs, files in os.walk(folder_path):
-            # Remove ignored directories
-            dirs[:] = [d for d in dirs if d not in ignore_folders]
-            
-            for file in files:
-                file_path = os.path.join(root, file)
-                lines_of_code = self.count_lines_of_code(file_path)
-                
-                if lines_of_code > 0:
-                    try:
-                        content = self.get_file_content(file_path)
-                        relative_path = os.path.relpath(file_path, folder_path)
-                        file_contents += f"// File: {relative_path} ({lines_of_code} lines)\n"
-                        file_contents += content + "\n\n" + "="*80 + "\n\n"
-                        file_count += 1
-                    except Exception:
-                        continue
+        with instrumentation.phase("export"):
+            for file_entry in files:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise ScanCancelled()
+                file_count += 1
+                if finder is not None and finder.is_candidate(file_entry):
+                    original = self._export_candidate(write, file_entry, folder_path, finder)
+                    if original is not None:
+                        relative_path = os.path.relpath(file_entry.path, folder_path)
+                        original_path = os.path.relpath(original.path, folder_path)
+                        write(f"// File: {relative_path} ({file_entry.lines} lines) = same content as {original_path}\n\n")
+                        instrumentation.count("duplicate files", 1)
+                    continue
+                write(self._export_header(file_entry, folder_path))
+                for chunk in self.iter_file_content(file_entry.path):
+                    write(chunk)
+                write(EXPORT_SEPARATOR)
+            if plan is not None:
+                write(f"// {plan.describe()}; {plan.omitted:,} files omitted\n")
         
-        return file_contents, file_count
+        instrumentation.count("files exported", file_count)
+        return file_count
     
-    def get_folder_stats(self, folder_path: str, ignore_folders: List[str] = None) -> Dict:
-        """Get comprehensive folder statistics"""
-        if ignore_folders is None:
-            ignore_folders = []
+    def _export_candidate(self, write: Callable[[str], object], file_entry: ScanEntry, folder_path: str,
+                          finder: DuplicateFinder) -> Optional[ScanEntry]:
+        """Write a file that may duplicate an earlier one, hashing it during its only read
+
+        Returns the earlier copy instead of writing anything when the body was already exported.
+        """
+        signature = self._content_signature(file_entry)
+        digest = self.digest_cache.get(file_entry.path, signature) if signature is not None else None
+        if digest is not None:
+            original = finder.original_of(file_entry, digest)
+            if original is not None:
+                return original
+            chunks = self.iter_file_content(file_entry.path)
+        else:
+            # Buffer the body until its hash shows whether it is new; candidates
+            # are text files below MAX_TEXT_FILE_SIZE
+            chunks, digest = self._read_with_digest(file_entry)
+            if signature is not None:
+                self.digest_cache.put(file_entry.path, signature, digest)
+            original = finder.original_of(file_entry, digest)
+            if original is not None:
+                return original
         
-        stats = {
-            'total_files': 0,
-            'total_lines': 0,
-            'file_types': {},
-            'folder_count': 0
-        }
+        write(self._export_header(file_entry, folder_path))
+        for chunk in chunks:
+            write(chunk)
+        write(EXPORT_SEPARATOR)
+        return None
+    
+    def _read_with_digest(self, file_entry: ScanEntry) -> Tuple[List[str], bytes]:
+        """Text of a file as exported, and the hash of its bytes as count_file_digest computes it"""
+        content_hash = new_content_hash()
+        try:
+            with open(file_entry.path, "rb") as file:
+                data = file.read()
+            content_hash.update(data)
+            # The text iter_file_content would give: UTF-8 with universal newlines
+            text = data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+        except (OSError, UnicodeDecodeError) as e:
+            text = f"Error reading file: {str(e)}"
+            content_hash.update(text.encode("utf-8"))
+        return [text], content_hash.digest()
+    
+    def _content_signature(self, file_entry: ScanEntry) -> Optional[Signature]:
+        """Current file_signature of a file, or None if it cannot be stat'ed"""
+        try:
+            return file_signature(os.stat(file_entry.path))
+        except OSError:
+            return None
+    
+    def content_digest(self, file_entry: ScanEntry) -> bytes:
+        """Hash of a file's bytes, from the scan's read when it hashed the file, else read now"""
+        signature = self._content_signature(file_entry)
+        digest = self.digest_cache.get(file_entry.path, signature) if signature is not None else None
+        if digest is None:
+            digest = self._read_with_digest(file_entry)[1]
+            if signature is not None:
+                self.digest_cache.put(file_entry.path, signature, digest)
+        return digest
+    
+    def _export_header(self, file_entry: ScanEntry, folder_path: str) -> str:
+        """Line written before each file of an export"""
+        relative_path = os.path.relpath(file_entry.path, folder_path)
+        return f"// File: {relative_path} ({file_entry.lines} lines)\n"
+    
+    def plan_files_content(self, snapshot: FolderSnapshot, limit: int, unit: str = PACK_DEFAULT_UNIT,
+                           strategy: str = PACK_DEFAULT_STRATEGY) -> PackingPlan:
+        """Pick the files of snapshot that fit a byte, line or token budget without reading them"""
+        def overhead(file_entry: ScanEntry) -> int:
+            text = self._export_header(file_entry, snapshot.folder_path) + EXPORT_SEPARATOR
+            if unit == "lines":
+                return text.count("\n")
+            if unit == "bytes":
+                return len(text.encode("utf-8"))
+            if self.token_estimator.needs_text:
+                return self.token_estimator.count_text(text)
+            return self.token_estimator.count_bytes(len(text.encode("utf-8")))
         
-        for root, dirs, files in os.walk(folder_path):
-            dirs[:] = [d for d in dirs if d not in ignore_folders]
-            stats['folder_count'] += len(dirs)
+        with instrumentation.phase("pack"):
+            plan = plan_pack(snapshot, limit, unit, strategy, overhead)
+        instrumentation.count("files packed", len(plan.selected))
+        return plan
+    
+    def get_all_files_content(self, folder_path: str, ignore_folders: List[str] = None, snapshot: FolderSnapshot = None,
+                              cancel_event=None, plan: PackingPlan = None, dedup: bool = DEDUP_FILES) -> Tuple[str, int]:
+        """Get content of all files in folder, or only those of a packing plan"""
+        parts = []
+        file_count = self.export_files_content(parts.append, folder_path, ignore_folders, snapshot, cancel_event,
+                                               plan, dedup)
+        return "".join(parts), file_count
+    
+    def get_folder_stats(self, folder_path: str, ignore_folders: List[str] = None, snapshot: FolderSnapshot = None,
+                         progress_callback=None, cancel_event=None, use_gitignore: bool = USE_GITIGNORE,
+                         dedup: bool = DEDUP_FILES) -> Dict:
+        """Get comprehensive folder statistics, with duplicate bodies counted when dedup is on"""
+        if snapshot is None:
+            snapshot = self.scan_folder(folder_path, ignore_folders, progress_callback, cancel_event, use_gitignore,
+                                        dedup)
+        with instrumentation.phase("stats"):
+            stats = snapshot.get_stats()
+        if dedup:
+            def digest_of(file_entry: ScanEntry) -> bytes:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise ScanCancelled()
+                return self.content_digest(file_entry)
             
-            for file in files:
-                file_path = os.path.join(root, file)
-                lines = self.count_lines_of_code(file_path)
-                
-                if lines > 0:
-                    stats['total_files'] += 1
-                    stats['total_lines'] += lines
-                    
-                    # Track file extensions
-                    ext = os.path.splitext(file)[1].lower()
-                    if ext:
-                        stats['file_types'][ext] = stats['file_types'].get(ext, 0) + 1
-        
+            with instrumentation.phase("dedup"):
+                stats.update(duplicate_stats(snapshot.iter_files(), digest_of))
         return stats
\ No newline at end of file
@@ -0,0 +1,303 @@
+"""
+Folder statistics computed from the columns of a TreeTable, with NumPy when available
+"""
+import heapq
+import math
+import os
+from typing import Dict, List, Sequence
+from models.tree_table import TreeTable, ROOT_ROW, FLAG_DIR, FLAG_SKIPPED
+from utils.constants import STATS_ENGINE, STATS_TOP_N, STATS_PERCENTILES
+
+
+def load_numpy():
+    """The numpy module, or None when it is not installed (optional dependency)"""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def compute_folder_stats(table: TreeTable, top_n: int = STATS_TOP_N,
+                         percentiles: Sequence[int] = STATS_PERCENTILES, engine: str = STATS_ENGINE) -> Dict:
+    """Totals, per-extension and per-directory rollups, percentiles, largest files and depths
+
+    Only rows reachable from the root are counted, so rows orphaned by watch mode
+    rescans are ignored. Both engines return identical results; percentiles are
+    interpolated by the same Python code in both.
+    """
+    numpy = load_numpy() if engine != "python" else None
+    if numpy is not None:
+        return _numpy_stats(numpy, table, top_n, percentiles)
+    return _python_stats(table, top_n, percentiles)
+
+
+def _percentile(sorted_values: Sequence[int], q: float) -> float:
+    """Linearly interpolated percentile, the method of numpy.percentile's default
+
+    Used by both engines: numpy.percentile rounds its interpolation differently,
+    which can move a result that is close to .5 to the other whole number.
+    """
+    position = (len(sorted_values) - 1) * q / 100
+    low = math.floor(position)
+    high = math.ceil(position)
+    low_value, high_value = int(sorted_values[low]), int(sorted_values[high])
+    return low_value + (high_value - low_value) * (position - low)
+
+
+def _summary(values_at: Dict[str, float], maximum: int) -> Dict[str, int]:
+    """Percentiles rounded to whole bytes or lines, plus the maximum"""
+    summary = {name: int(round(value)) for name, value in values_at.items()}
+    summary['max'] = int(maximum)
+    return summary
+
+
+def _largest_file(table: TreeTable, row: int) -> Dict:
+    """Row of the largest files list"""
+    return {
+        'path': os.path.relpath(table.path(row), table.root_path),
+        'size': table.size[row],
+        'lines': table.lines[row],
+        'skipped': bool(table.flags[row] & FLAG_SKIPPED),
+    }
+
+
+def _directory(table: TreeTable, row: int, files: int, size: int) -> Dict:
+    """Rollup of one top-level folder"""
+    return {
+        'name': table.name(row),
+        'files': int(files),
+        'bytes': int(size),
+        'lines': table.lines[row],
+        'tokens': table.tokens[row],
+    }
+
+
+def _top_directories(directories: List[Dict], top_n: int) -> List[Dict]:
+    """Top-level folders with the most lines"""
+    return sorted(directories, key=lambda d: (-d['lines'], d['name']))[:top_n]
+
+
+def _numpy_stats(np, table: TreeTable, top_n: int, percentiles: Sequence[int]) -> Dict:
+    """Vectorized statistics over copies of the table columns"""
+    count = len(table)
+    parent = np.array(table.parent, dtype=np.int64)
+    flags = np.frombuffer(bytes(table.flags), dtype=np.uint8)
+    size = np.array(table.size, dtype=np.int64)
+    lines = np.array(table.lines, dtype=np.int64)
+    tokens = np.array(table.tokens, dtype=np.int64)
+    child_start = np.array(table.child_start, dtype=np.int64)
+    child_end = child_start + np.array(table.child_count, dtype=np.int64)
+    name_id = np.array(table.name_id, dtype=np.int64)
+    rows = np.arange(count)
+
+    # A row is live when it lies inside its parent's child block and so does every
+    # ancestor. Pointer jumping resolves that and the depth of the folders in
+    # log2(depth) steps; files then take one step from their folder.
+    is_dir = (flags & FLAG_DIR) != 0
+    safe_parent = np.where(parent >= 0, parent, 0)
+    live = (rows >= child_start[safe_parent]) & (rows < child_end[safe_parent])
+    live[ROOT_ROW] = True
+    depth = (parent >= 0).astype(np.int64)
+    ancestor = parent.copy()
+    active = np.flatnonzero(is_dir & (ancestor >= 0))
+    while active.size:
+        jump = ancestor[active]
+        live[active] &= live[jump]
+        depth[active] += depth[jump]
+        ancestor[active] = ancestor[jump]
+        active = active[ancestor[active] >= 0]
+    leaves = np.flatnonzero(~is_dir)
+    live[leaves] &= live[parent[leaves]]
+    depth[leaves] += depth[parent[leaves]]
+
+    files = live & ~is_dir
+    skipped = files & ((flags & FLAG_SKIPPED) != 0)
+    text_rows = np.flatnonzero(files & ~skipped & (lines > 0))
+    file_rows = np.flatnonzero(files)
+    text_sizes = size[text_rows]
+    text_lines = lines[text_rows]
+
+    # Per-extension histograms
+    extensions = table.names.extensions
+    extension_of_name = np.array(table.names.extension_ids(), dtype=np.int64)
+    extension_ids = extension_of_name[name_id[text_rows]]
+    ext_files = np.bincount(extension_ids, minlength=len(extensions))
+    ext_lines = np.bincount(extension_ids, weights=text_lines, minlength=len(extensions))
+    ext_bytes = np.bincount(extension_ids, weights=text_sizes, minlength=len(extensions))
+
+    # Per-directory rollups of files and bytes, one depth level at a time
+    sub_files = np.zeros(count, dtype=np.int64)
+    sub_bytes = np.zeros(count, dtype=np.int64)
+    sub_files[text_rows] = 1
+    sub_bytes[text_rows] = text_sizes
+    live_rows = np.flatnonzero(live)
+    live_rows = live_rows[np.argsort(depth[live_rows], kind="stable")]
+    bounds = np.searchsorted(depth[live_rows], np.arange(int(depth[live_rows].max()) + 2))
+    for level in range(len(bounds) - 2, 0, -1):
+        level_rows = live_rows[bounds[level]:bounds[level + 1]]
+        np.add.at(sub_files, parent[level_rows], sub_files[level_rows])
+        np.add.at(sub_bytes, parent[level_rows], sub_bytes[level_rows])
+
+    # Largest files, ties broken by scan order like the pure-Python engine
+    largest = []
+    if file_rows.size:
+        file_sizes = size[file_rows]
+        threshold = np.partition(file_sizes, -min(top_n, file_rows.size))[-min(top_n, file_rows.size)]
+        candidates = file_rows[file_sizes >= threshold]
+        candidates = candidates[np.lexsort((candidates, -size[candidates]))][:top_n]
+        largest = [_largest_file(table, int(row)) for row in candidates]
+
+    size_percentiles = line_percentiles = {}
+    if text_rows.size:
+        sorted_sizes = np.sort(text_sizes)
+        sorted_lines = np.sort(text_lines)
+        size_percentiles = _summary({f"p{q}": _percentile(sorted_sizes, q) for q in percentiles}, sorted_sizes[-1])
+        line_percentiles = _summary({f"p{q}": _percentile(sorted_lines, q) for q in percentiles}, sorted_lines[-1])
+
+    depth_counts = np.bincount(depth[text_rows] - 1) if text_rows.size else []
+    top_level = [int(row) for row in table.children(ROOT_ROW) if table.flags[row] & FLAG_DIR]
+
+    return {
+        'total_files': int(text_rows.size),
+        'total_lines': int(text_lines.sum()),
+        'total_tokens': int(tokens[text_rows].sum()),
+        'file_types': {extensions[i]: int(ext_files[i]) for i in np.flatnonzero(ext_files) if extensions[i]},
+        'folder_count': int(np.count_nonzero(live & is_dir)) - 1,
+        'skipped_files': int(np.count_nonzero(skipped)),
+        'skipped_bytes': int(size[skipped].sum()),
+        'extensions': {
+            extensions[i]: {'files': int(ext_files[i]), 'lines': int(ext_lines[i]), 'bytes': int(ext_bytes[i])}
+            for i in np.flatnonzero(ext_files)
+        },
+        'size_percentiles': size_percentiles,
+        'line_percentiles': line_percentiles,
+        'largest_files': largest,
+        'depth_histogram': {depth_level: int(files_at) for depth_level, files_at in enumerate(depth_counts) if files_at},
+        'directories': _top_directories(
+            [_directory(table, row, sub_files[row], sub_bytes[row]) for row in top_level], top_n),
+        'stats_engine': "numpy",
+    }
+
+
+def _python_stats(table: TreeTable, top_n: int, percentiles: Sequence[int]) -> Dict:
+    """Same statistics from one walk over the live rows"""
+    flags, size, lines, tokens = table.flags, table.size, table.lines, table.tokens
+    extensions = table.names.extensions
+    extension_of_name = table.names.extension_ids()
+    name_id = table.name_id
+
+    folder_count = 0
+    skipped_files = 0
+    skipped_bytes = 0
+    total_tokens = 0
+    file_rows = []
+    text_sizes = []
+    text_lines = []
+    by_extension: Dict[int, List[int]] = {}
+    depth_histogram: Dict[int, int] = {}
+    top_files: Dict[int, int] = {}
+    top_bytes: Dict[int, int] = {}
+
+    # Each frame is (row, depth of its folder, top-level ancestor or the row itself)
+    stack = [(row, 0, row) for row in table.children(ROOT_ROW)]
+    while stack:
+        row, depth, top = stack.pop()
+        if flags[row] & FLAG_DIR:
+            folder_count += 1
+            stack.extend((child, depth + 1, top) for child in table.children(row))
+            continue
+
+        file_rows.append(row)
+        if flags[row] & FLAG_SKIPPED:
+            skipped_files += 1
+            skipped_bytes += size[row]
+        elif lines[row] > 0:
+            text_sizes.append(size[row])
+            text_lines.append(lines[row])
+            total_tokens += tokens[row]
+            totals = by_extension.setdefault(extension_of_name[name_id[row]], [0, 0, 0])
+            totals[0] += 1
+            totals[1] += lines[row]
+            totals[2] += size[row]
+            depth_histogram[depth] = depth_histogram.get(depth, 0) + 1
+            top_files[top] = top_files.get(top, 0) + 1
+            top_bytes[top] = top_bytes.get(top, 0) + size[row]
+
+    size_percentiles = line_percentiles = {}
+    if text_sizes:
+        text_sizes.sort()
+        text_lines_sorted = sorted(text_lines)
+        size_percentiles = _summary({f"p{q}": _percentile(text_sizes, q) for q in percentiles}, text_sizes[-1])
+        line_percentiles = _summary({f"p{q}": _percentile(text_lines_sorted, q) for q in percentiles},
+                                    text_lines_sorted[-1])
+
+    largest = heapq.nsmallest(top_n, file_rows, key=lambda row: (-size[row], row))
+    top_level = [row for row in table.children(ROOT_ROW) if flags[row] & FLAG_DIR]
+
+    return {
+        'total_files': len(text_sizes),
+        'total_lines': sum(text_lines),
+        'total_tokens': total_tokens,
+        'file_types': {extensions[i]: totals[0] for i, totals in sorted(by_extension.items()) if extensions[i]},
+        'folder_count': folder_count,
+        'skipped_files': skipped_files,
+        'skipped_bytes': skipped_bytes,
+        'extensions': {
+            extensions[i]: {'files': totals[0], 'lines': totals[1], 'bytes': totals[2]}
+            for i, totals in sorted(by_extension.items())
+        },
+        'size_percentiles': size_percentiles,
+        'line_percentiles': line_percentiles,
+        'largest_files': [_largest_file(table, row) for row in largest],
+        'depth_histogram': dict(sorted(depth_histogram.items())),
+        'directories': _top_directories(
+            [_directory(table, row, top_files.get(row, 0), top_bytes.get(row, 0)) for row in top_level], top_n),
+        'stats_engine': "python",
+    }
+
+
+def format_size(size: int) -> str:
+    """Human readable byte count"""
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:,.0f} {unit}" if unit == "B" else f"{size:,.1f} {unit}"
+        size /= 1024
+
+
+def format_stats_details(stats: Dict, top_n: int = STATS_TOP_N) -> str:
+    """Plain-text report of the rollups, shared by the statistics dialog and the CLI"""
+    report = ""
+    extensions = sorted(stats.get('extensions', {}).items(), key=lambda item: (-item[1]['lines'], item[0]))
+    if extensions:
+        report += "\nLines and Bytes by Extension:\n"
+        for ext, totals in extensions[:top_n]:
+            report += (f"  {ext or '(none)':<10} {totals['files']:>8,} files {totals['lines']:>12,} lines "
+                       f"{format_size(totals['bytes']):>10}\n")
+        if len(extensions) > top_n:
+            report += f"  ... {len(extensions) - top_n} more\n"
+
+    for key, title, as_size in (('size_percentiles', "File Size", True), ('line_percentiles', "Lines per File", False)):
+        summary = stats.get(key)
+        if summary:
+            values = "  ".join(f"{name}: {format_size(value) if as_size else f'{value:,}'}"
+                               for name, value in summary.items())
+            report += f"\n{title}: {values}\n"
+
+    if stats.get('largest_files'):
+        report += "\nLargest Files:\n"
+        for file_info in stats['largest_files']:
+            note = " (binary/generated)" if file_info['skipped'] else f" ({file_info['lines']:,} lines)"
+            report += f"  {format_size(file_info['size']):>10}  {file_info['path']}{note}\n"
+
+    if stats.get('directories'):
+        report += "\nTop-Level Folders:\n"
+        for folder in stats['directories']:
+            report += (f"  {folder['name']:<24} {folder['files']:>8,} files {folder['lines']:>12,} lines "
+                       f"{format_size(folder['bytes']):>10}\n")
+
+    if stats.get('depth_histogram'):
+        report += "\nFiles by Folder Depth:\n"
+        for depth, count in stats['depth_histogram'].items():
+            report += f"  {depth:>3}: {count:,}\n"
+    return report
@@ -0,0 +1,208 @@
+"""
+Ignore patterns: user globs plus nested .gitignore/.ignore files, compiled for fast matching
+"""
+import os
+import re
+from typing import List, Optional, Sequence, Tuple
+from utils.constants import IGNORE_FILE_NAMES
+
+_GLOB_CHARS = re.compile(r"[*?\[\\]")
+
+
+def translate_glob(pattern: str) -> str:
+    """Translate a gitignore glob into a regex body (* and ? stop at /, ** crosses folders)"""
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern.startswith("**", i):
+                if pattern.startswith("**/", i):
+                    out.append("(?:.*/)?")
+                    i += 3
+                else:
+                    out.append(".*")
+                    i += 2
+                continue
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            end = pattern.find("]", i + 2)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end]
+                if body[0] in "!^":
+                    body = "^" + body[1:]
+                out.append("[" + body.replace("\\", "\\\\") + "]")
+                i = end
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+def parse_ignore_lines(lines: Sequence[str]) -> List[Tuple[str, bool, bool, bool]]:
+    """Parse gitignore lines into (glob, negated, dir_only, anchored) rules"""
+    rules = []
+    for raw in lines:
+        line = raw.rstrip("\n\r")
+        if not line.strip() or line.startswith("#"):
+            continue
+        if not line.endswith("\\ "):
+            line = line.rstrip()
+
+        negated = line.startswith("!")
+        if negated:
+            line = line[1:]
+        elif line.startswith("\\"):
+            line = line[1:]
+
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+
+        # A slash anywhere but the end ties the pattern to the ignore file's folder
+        anchored = "/" in line
+        rules.append((line.lstrip("/"), negated, dir_only, anchored))
+    return rules
+
+
+class IgnoreRules:
+    """Rules from one ignore file (or the user's globs), relative to base_path"""
+
+    def __init__(self, base_path: str, lines: Sequence[str]):
+        self.base_path = base_path
+        self._prefix_length = len(os.path.join(base_path, ""))
+        rules = parse_ignore_lines(lines)
+        self.has_negations = any(negated for _, negated, _, _ in rules)
+
+        if not self.has_negations:
+            # Nothing can re-include a path, so "dir/**" may prune dir itself
+            rules = [(glob[:-3], False, True, anchored) if glob.endswith("/**") and glob[:-3] else
+                     (glob, negated, dir_only, anchored)
+                     for glob, negated, dir_only, anchored in rules]
+            self._compile_any(rules)
+        else:
+            self._ordered = [
+                (re.compile(translate_glob(glob) + r"\Z"), negated, dir_only, anchored)
+                for glob, negated, dir_only, anchored in rules
+            ]
+
+    def _compile_any(self, rules):
+        """Fast path: literal names in sets, everything else in one regex per kind"""
+        self.names = set()
+        self.dir_names = set()
+        patterns = {(False, False): [], (False, True): [], (True, False): [], (True, True): []}
+        for glob, _, dir_only, anchored in rules:
+            if not anchored and not _GLOB_CHARS.search(glob):
+                (self.dir_names if dir_only else self.names).add(glob)
+            else:
+                patterns[(anchored, dir_only)].append(translate_glob(glob))
+
+        def combine(bodies):
+            return re.compile("(?:" + "|".join(bodies) + r")\Z") if bodies else None
+
+        self.name_regex = combine(patterns[(False, False)])
+        self.dir_name_regex = combine(patterns[(False, True)])
+        self.path_regex = combine(patterns[(True, False)])
+        self.dir_path_regex = combine(patterns[(True, True)])
+
+    def _relative(self, path: str) -> str:
+        """Path relative to base_path with / separators"""
+        relative = path[self._prefix_length:]
+        return relative.replace(os.sep, "/") if os.sep != "/" else relative
+
+    def match(self, path: str, name: str, is_dir: bool) -> Optional[bool]:
+        """True if ignored, False if re-included by a ! rule, None if no rule applies"""
+        if not self.has_negations:
+            if name in self.names or (is_dir and name in self.dir_names):
+                return True
+            if self.name_regex and self.name_regex.match(name):
+                return True
+            if is_dir and self.dir_name_regex and self.dir_name_regex.match(name):
+                return True
+            if self.path_regex or (is_dir and self.dir_path_regex):
+                relative = self._relative(path)
+                if self.path_regex and self.path_regex.match(relative):
+                    return True
+                if is_dir and self.dir_path_regex and self.dir_path_regex.match(relative):
+                    return True
+            return None
+
+        # Last matching rule wins
+        relative = None
+        for regex, negated, dir_only, anchored in reversed(self._ordered):
+            if dir_only and not is_dir:
+                continue
+            if anchored:
+                if relative is None:
+                    relative = self._relative(path)
+                subject = relative
+            else:
+                subject = name
+            if regex.match(subject):
+                return not negated
+        return None
+
+
+IgnoreChain = Tuple[IgnoreRules, ...]
+
+
+class IgnoreFilter:
+    """User globs, which always win, followed by .gitignore/.ignore rules deepest first"""
+
+    def __init__(self, root_path: str, patterns: Sequence[str], use_gitignore: bool = True):
+        self.root_path = root_path
+        self.patterns = list(patterns)
+        self.use_gitignore = use_gitignore
+        self.user_rules = IgnoreRules(root_path, self.patterns)
+
+    def chain_for_folder(self, folder_path: str, parent_chain: IgnoreChain, names) -> IgnoreChain:
+        """Rules in effect inside folder_path, given its parent's chain and its own file names"""
+        if not self.use_gitignore:
+            return parent_chain
+
+        lines = []
+        for file_name in IGNORE_FILE_NAMES:
+            if file_name in names:
+                lines.extend(self._read_lines(os.path.join(folder_path, file_name)))
+        if not lines:
+            return parent_chain
+        return (IgnoreRules(folder_path, lines),) + parent_chain
+
+    def chain_for_path(self, folder_path: str) -> IgnoreChain:
+        """Rebuild the chain for any folder below the root by reading its ancestors' files"""
+        chain: IgnoreChain = ()
+        relative = os.path.relpath(folder_path, self.root_path)
+        current = self.root_path
+        parts = [] if relative == os.curdir else relative.split(os.sep)
+        for part in [None] + parts:
+            if part is not None:
+                current = os.path.join(current, part)
+            names = [name for name in IGNORE_FILE_NAMES if os.path.isfile(os.path.join(current, name))]
+            chain = self.chain_for_folder(current, chain, names)
+        return chain
+
+    def is_ignored(self, path: str, name: str, is_dir: bool, chain: IgnoreChain) -> bool:
+        """Decide whether an entry is skipped (and, for folders, not descended into)"""
+        if self.user_rules.match(path, name, is_dir):
+            return True
+        for rules in chain:
+            decision = rules.match(path, name, is_dir)
+            if decision is not None:
+                return decision
+        return False
+
+    def _read_lines(self, file_path: str) -> List[str]:
+        """Lines of an ignore file, or nothing if it cannot be read"""
+        try:
+            with open(file_path, "r", encoding="utf-8", errors="replace") as file:
+                return file.read().splitlines()
+        except OSError:
+            return []
@@ -0,0 +1,102 @@
+"""
+Compact off-widget storage for very long tagged text (e.g. the ASCII tree)
+"""
+from array import array
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+
+class TaggedLineBuffer:
+    """Lines kept as one UTF-8 byte string with an offset table and a tag id per line"""
+
+    def __init__(self):
+        self._data = bytearray()
+        self._offsets = array("q", [0])   # line i is _data[_offsets[i]:_offsets[i + 1] - 1]
+        self._tag_ids = bytearray()
+        self._tags: List[str] = []
+        self._tag_ids_by_name: Dict[str, int] = {}
+
+    @classmethod
+    def from_lines(cls, lines: Iterable[Tuple[str, str]]) -> "TaggedLineBuffer":
+        """Build a buffer from (line, tag) pairs; lines must not contain newlines"""
+        buffer = cls()
+        data, offsets, tag_ids = buffer._data, buffer._offsets, buffer._tag_ids
+        known_tags = buffer._tag_ids_by_name
+        for line, tag in lines:
+            tag_id = known_tags.get(tag)
+            if tag_id is None:
+                buffer.append(line, tag)
+                continue
+            data += line.encode("utf-8")
+            data += b"\n"
+            offsets.append(len(data))
+            tag_ids.append(tag_id)
+        return buffer
+
+    def __len__(self) -> int:
+        return len(self._tag_ids)
+
+    def append(self, line: str, tag: str = ""):
+        """Add one line at the end"""
+        tag_id = self._tag_ids_by_name.get(tag)
+        if tag_id is None:
+            tag_id = len(self._tags)
+            self._tags.append(tag)
+            self._tag_ids_by_name[tag] = tag_id
+
+        self._data += line.encode("utf-8")
+        self._data += b"\n"
+        self._offsets.append(len(self._data))
+        self._tag_ids.append(tag_id)
+
+    def splice(self, edits: Sequence[Tuple[int, int, Sequence[Tuple[str, str]]]]) -> "TaggedLineBuffer":
+        """New buffer with lines start..stop of each (start, stop, lines) edit replaced
+
+        Edits are sorted by start and do not overlap; the lines between them are copied
+        as bytes, without decoding.
+        """
+        buffer = TaggedLineBuffer()
+        buffer._tags = list(self._tags)
+        buffer._tag_ids_by_name = dict(self._tag_ids_by_name)
+        position = 0
+        for start, stop, lines in edits:
+            buffer._copy_lines(self, position, start)
+            for line, tag in lines:
+                buffer.append(line, tag)
+            position = stop
+        buffer._copy_lines(self, position, len(self))
+        return buffer
+
+    def _copy_lines(self, source: "TaggedLineBuffer", start: int, stop: int):
+        """Append lines start..stop of a buffer with the same tag ids"""
+        if start >= stop:
+            return
+        begin, end = source._offsets[start], source._offsets[stop]
+        shift = len(self._data) - begin
+        self._data += source._data[begin:end]
+        if shift:
+            self._offsets.extend(offset + shift for offset in source._offsets[start + 1:stop + 1])
+        else:
+            self._offsets.extend(source._offsets[start + 1:stop + 1])
+        self._tag_ids += source._tag_ids[start:stop]
+
+    def raw_line(self, index: int) -> Tuple[bytes, int]:
+        """Encoded line and tag id, cheap to compare between buffers built alike"""
+        return bytes(self._data[self._offsets[index]:self._offsets[index + 1] - 1]), self._tag_ids[index]
+
+    def iter_lines(self, start: int = 0, stop: int = None) -> Iterator[Tuple[str, str]]:
+        """Yield (line, tag) pairs for lines start..stop, decoding only those lines"""
+        stop = len(self) if stop is None else min(stop, len(self))
+        data = memoryview(self._data)
+        offsets = self._offsets
+        for index in range(max(start, 0), stop):
+            line = bytes(data[offsets[index]:offsets[index + 1] - 1]).decode("utf-8")
+            yield line, self._tags[self._tag_ids[index]]
+
+    def get_text(self) -> str:
+        """All lines joined, each ending in a newline"""
+        return self._data.decode("utf-8")
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory used by the buffer"""
+        return len(self._data) + self._offsets.itemsize * len(self._offsets) + len(self._tag_ids)
@@ -0,0 +1,73 @@
+"""
+Bounded, stat-validated cache of per-file line and token counts
+"""
+import os
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from utils.constants import LINE_CACHE_MAX_ENTRIES
+
+Signature = Tuple[int, int, int]
+
+
+def file_signature(st: os.stat_result) -> Signature:
+    """Identify a file version by (size, mtime_ns, inode)"""
+    return (st.st_size, st.st_mtime_ns, st.st_ino)
+
+
+class LineCountCache:
+    """LRU cache of line counts that drops entries whose file has changed"""
+
+    def __init__(self, max_entries: int = LINE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Signature, Tuple[int, int]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, file_path: str) -> bool:
+        return file_path in self._entries
+
+    def get(self, file_path: str, signature: Signature) -> Optional[Tuple[int, int]]:
+        """Return the cached (lines, tokens) if the file still matches signature"""
+        cached = self._entries.get(file_path)
+        if cached is None:
+            self.misses += 1
+            return None
+
+        if cached[0] != signature:
+            del self._entries[file_path]
+            self.invalidations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(file_path)
+        self.hits += 1
+        return cached[1]
+
+    def put(self, file_path: str, signature: Signature, counts: Tuple[int, int]):
+        """Store counts, evicting the least recently used entries over budget"""
+        self._entries[file_path] = (signature, counts)
+        self._entries.move_to_end(file_path)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Drop every cached entry"""
+        self._entries.clear()
+
+    def get_stats(self) -> Dict:
+        """Hit/miss/eviction counters"""
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations
+        }
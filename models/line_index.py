@@ -0,0 +1,221 @@
+"""
+Persistent on-disk line and token count index shared across application restarts
+
+Usage:
+    python -m models.line_index stats [--index PATH]
+    python -m models.line_index prune [--index PATH] [--max-entries N]
+    python -m models.line_index clear [--index PATH]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from models.line_cache import Signature
+from utils.constants import APP_CACHE_DIR_NAME, LINE_INDEX_FILENAME, LINE_INDEX_WRITE_BATCH
+
+
+def default_cache_dir() -> str:
+    """Per-user cache directory for the application"""
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~\\AppData\\Local")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, APP_CACHE_DIR_NAME)
+
+
+def default_index_path() -> str:
+    """Location of the line count index file"""
+    return os.path.join(default_cache_dir(), LINE_INDEX_FILENAME)
+
+
+class LineCountIndex:
+    """SQLite table of line counts keyed by absolute path and validated by stat"""
+
+    def __init__(self, index_path: str = None):
+        self.index_path = index_path or default_index_path()
+        os.makedirs(os.path.dirname(os.path.abspath(self.index_path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._pending: List[Tuple] = []
+        self._conn = sqlite3.connect(self.index_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS line_counts ("
+            " path TEXT PRIMARY KEY,"
+            " size INTEGER NOT NULL,"
+            " mtime_ns INTEGER NOT NULL,"
+            " inode INTEGER NOT NULL,"
+            " lines INTEGER NOT NULL,"
+            " updated REAL NOT NULL,"
+            " tokens INTEGER NOT NULL DEFAULT 0,"
+            " tokenizer TEXT NOT NULL DEFAULT ''"
+            ") WITHOUT ROWID"
+        )
+        # Indexes written before token estimates existed lack the last two columns;
+        # their rows have no tokenizer, so they are re-read once
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(line_counts)")}
+        if "tokens" not in columns:
+            self._conn.execute("ALTER TABLE line_counts ADD COLUMN tokens INTEGER NOT NULL DEFAULT 0")
+            self._conn.execute("ALTER TABLE line_counts ADD COLUMN tokenizer TEXT NOT NULL DEFAULT ''")
+        self._conn.commit()
+
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    @classmethod
+    def open_default(cls) -> Optional["LineCountIndex"]:
+        """Open the per-user index, or None if it is unavailable"""
+        try:
+            return cls()
+        except (OSError, sqlite3.Error):
+            return None
+
+    def get(self, file_path: str, signature: Signature, tokenizer: str = "") -> Optional[Tuple[int, int]]:
+        """Return the stored (lines, tokens) if the file still matches signature and tokenizer"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, inode, lines, tokens, tokenizer FROM line_counts WHERE path = ?",
+                (os.path.abspath(file_path),)
+            ).fetchone()
+
+        if row is None or tuple(row[:3]) != signature or row[5] != tokenizer:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return row[3], row[4]
+
+    def put(self, file_path: str, signature: Signature, counts: Tuple[int, int], tokenizer: str = ""):
+        """Queue counts to be written on the next flush"""
+        size, mtime_ns, inode = signature
+        lines, tokens = counts
+        with self._lock:
+            self._pending.append((os.path.abspath(file_path), size, mtime_ns, inode, lines, time.time(),
+                                  tokens, tokenizer))
+            should_flush = len(self._pending) >= LINE_INDEX_WRITE_BATCH
+        if should_flush:
+            self.flush()
+
+    def flush(self):
+        """Write queued counts in a single transaction"""
+        with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, []
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO line_counts "
+                "(path, size, mtime_ns, inode, lines, updated, tokens, tokenizer) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                pending
+            )
+            self._conn.commit()
+            self.writes += len(pending)
+
+    def prune(self, max_entries: int = None) -> int:
+        """Remove entries for missing or changed files, then trim to max_entries"""
+        self.flush()
+        with self._lock:
+            rows = self._conn.execute("SELECT path, size, mtime_ns, inode FROM line_counts").fetchall()
+
+        stale = []
+        for path, size, mtime_ns, inode in rows:
+            try:
+                st = os.stat(path)
+            except OSError:
+                stale.append((path,))
+                continue
+            if (st.st_size, st.st_mtime_ns, st.st_ino) != (size, mtime_ns, inode):
+                stale.append((path,))
+
+        with self._lock:
+            self._conn.executemany("DELETE FROM line_counts WHERE path = ?", stale)
+            removed = len(stale)
+
+            if max_entries is not None:
+                cursor = self._conn.execute(
+                    "DELETE FROM line_counts WHERE path NOT IN "
+                    "(SELECT path FROM line_counts ORDER BY updated DESC LIMIT ?)",
+                    (max_entries,)
+                )
+                removed += cursor.rowcount
+
+            self._conn.commit()
+            self._conn.execute("VACUUM")
+        return removed
+
+    def clear(self):
+        """Delete every entry"""
+        with self._lock:
+            self._pending.clear()
+            self._conn.execute("DELETE FROM line_counts")
+            self._conn.commit()
+            self._conn.execute("VACUUM")
+
+    def get_stats(self) -> Dict:
+        """Size of the index and counters for this session"""
+        with self._lock:
+            entries, total_lines = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(MAX(lines, 0)), 0) FROM line_counts"
+            ).fetchone()
+        try:
+            file_size = os.path.getsize(self.index_path)
+        except OSError:
+            file_size = 0
+
+        return {
+            'path': self.index_path,
+            'entries': entries,
+            'total_lines': total_lines,
+            'file_size': file_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'writes': self.writes
+        }
+
+    def close(self):
+        """Flush pending writes and close the database"""
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+
+def main(argv: List[str] = None) -> int:
+    """Inspect or prune the line count index from the command line"""
+    parser = argparse.ArgumentParser(
+        prog="python -m models.line_index",
+        description="Inspect and prune the persistent line count index"
+    )
+    parser.add_argument("command", choices=["stats", "prune", "clear"])
+    parser.add_argument("--index", default=None, help="index file (default: per-user cache dir)")
+    parser.add_argument("--max-entries", type=int, default=None,
+                        help="with prune: keep only the N most recently updated entries")
+    args = parser.parse_args(argv)
+
+    index = LineCountIndex(args.index)
+    try:
+        if args.command == "prune":
+            removed = index.prune(args.max_entries)
+            print(f"Removed {removed:,} entries")
+        elif args.command == "clear":
+            index.clear()
+            print("Index cleared")
+
+        stats = index.get_stats()
+        print(f"Index: {stats['path']}")
+        print(f"Entries: {stats['entries']:,}")
+        print(f"Lines recorded: {stats['total_lines']:,}")
+        print(f"File size: {stats['file_size']:,} bytes")
+    finally:
+        index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
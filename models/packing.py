@@ -0,0 +1,134 @@
+"""
+Budget-aware file selection for dumps, using only scan data (no file reads)
+"""
+import math
+from typing import Callable, Dict, List
+from models.scanner import FolderSnapshot, ScanEntry
+from utils.constants import (
+    PROGRAMMING_EXTENSIONS, PACK_PRIORITY_WEIGHTS, PACK_KNAPSACK_MAX_FILES, PACK_KNAPSACK_BUCKETS
+)
+
+PACK_UNITS = ("tokens", "lines", "bytes")
+PACK_STRATEGIES = ("greedy", "knapsack")
+
+
+class PackingPlan:
+    """Files chosen to fit a budget, in tree order"""
+
+    def __init__(self, selected: List[ScanEntry], candidates: int, used: int, limit: int, unit: str):
+        self.selected = selected
+        self.candidates = candidates
+        self.used = used
+        self.limit = limit
+        self.unit = unit
+
+    @property
+    def omitted(self) -> int:
+        """Exportable files left out of the dump"""
+        return self.candidates - len(self.selected)
+
+    def describe(self) -> str:
+        """One line summary, also written at the end of a packed dump"""
+        return (f"Packed {len(self.selected):,} of {self.candidates:,} files: "
+                f"{self.used:,} / {self.limit:,} {self.unit}")
+
+
+def entry_cost(entry: ScanEntry, unit: str) -> int:
+    """Size of a file in the budget unit, from the scan alone"""
+    if unit == "tokens":
+        return entry.tokens
+    if unit == "lines":
+        return entry.lines
+    return entry.size
+
+
+def priority_scores(snapshot: FolderSnapshot, files: List[ScanEntry],
+                    weights: Dict[str, float] = None) -> List[float]:
+    """Higher is better: source files, shallow paths, recent changes and small files first"""
+    weights = weights or PACK_PRIORITY_WEIGHTS
+    if not files:
+        return []
+
+    newest = max(entry.mtime for entry in files)
+    oldest = min(entry.mtime for entry in files)
+    mtime_span = (newest - oldest) or 1.0
+    largest = math.log1p(max(entry.size for entry in files)) or 1.0
+
+    scores = []
+    for entry in files:
+        depth = snapshot.table.depth(entry.row) - 1
+        score = weights['extension'] * (entry.extension in PROGRAMMING_EXTENSIONS)
+        score -= weights['depth'] * depth / (depth + 1)
+        score += weights['recency'] * (entry.mtime - oldest) / mtime_span
+        score -= weights['size'] * math.log1p(entry.size) / largest
+        scores.append(score)
+    return scores
+
+
+def _pack_greedy(costs: List[int], scores: List[float], limit: int) -> List[int]:
+    """Take files in priority order while they fit"""
+    chosen = []
+    used = 0
+    for i in sorted(range(len(costs)), key=lambda i: -scores[i]):
+        if used + costs[i] <= limit:
+            chosen.append(i)
+            used += costs[i]
+    return chosen
+
+
+def _pack_knapsack(costs: List[int], scores: List[float], limit: int) -> List[int]:
+    """0/1 knapsack maximizing total priority, with costs rounded up to PACK_KNAPSACK_BUCKETS steps"""
+    step = max(1, math.ceil(limit / PACK_KNAPSACK_BUCKETS))
+    capacity = limit // step
+    weights = [math.ceil(cost / step) for cost in costs]
+    low = min(scores)
+    values = [score - low + 1.0 for score in scores]  # knapsack needs positive values
+
+    best = [0.0] * (capacity + 1)
+    taken = []  # per item: bytearray of capacities at which it was taken
+    for weight, value in zip(weights, values):
+        row = bytearray(capacity + 1)
+        if weight <= capacity:
+            for c in range(capacity, weight - 1, -1):
+                candidate = best[c - weight] + value
+                if candidate > best[c]:
+                    best[c] = candidate
+                    row[c] = 1
+        taken.append(row)
+
+    chosen = []
+    c = capacity
+    for i in range(len(costs) - 1, -1, -1):
+        if taken[i][c]:
+            chosen.append(i)
+            c -= weights[i]
+    return chosen
+
+
+def plan_pack(snapshot: FolderSnapshot, limit: int, unit: str = "tokens", strategy: str = "greedy",
+              overhead: Callable[[ScanEntry], int] = None, weights: Dict[str, float] = None) -> PackingPlan:
+    """Choose the exportable files that fit limit, ranked by priority_scores
+
+    overhead(entry) adds the cost of the header written before each file.
+    Knapsack falls back to greedy above PACK_KNAPSACK_MAX_FILES candidates.
+    """
+    if unit not in PACK_UNITS:
+        raise ValueError(f"unknown budget unit: {unit}")
+
+    files = [entry for entry in snapshot.iter_files() if entry.lines > 0]
+    costs = [entry_cost(entry, unit) + (overhead(entry) if overhead else 0) for entry in files]
+    scores = priority_scores(snapshot, files, weights)
+
+    if strategy == "knapsack" and len(files) <= PACK_KNAPSACK_MAX_FILES:
+        chosen = _pack_knapsack(costs, scores, limit)
+    else:
+        chosen = _pack_greedy(costs, scores, limit)
+
+    chosen.sort()  # back to tree order
+    return PackingPlan(
+        [files[i] for i in chosen],
+        len(files),
+        sum(costs[i] for i in chosen),
+        limit,
+        unit
+    )
@@ -0,0 +1,569 @@
+"""
+Single-pass folder scanning and in-memory snapshot
+"""
+import os
+import stat
+import time
+from collections import Counter
+from typing import List, Tuple, Dict, Iterator, Optional, Callable, Set
+from utils.constants import PROGRESS_BATCH_SIZE, LINE_COUNT_BATCH_SIZE, DEBUG_SYSCALLS, DEDUP_FILES
+from models.ignore_rules import IgnoreFilter, IgnoreChain
+from models.tree_table import TreeTable, ROOT_ROW, FLAG_DIR, FLAG_FILE, FLAG_SKIPPED, child_order
+from models.folder_stats import compute_folder_stats
+from utils.instrumentation import instrumentation
+
+
+class ScanCancelled(Exception):
+    """Raised when a scan is stopped through its cancel event"""
+
+
+class ScanProgress:
+    """Running counters reported while a scan is in flight"""
+    __slots__ = ('files_scanned', 'folders_scanned', 'lines_counted', 'started')
+
+    def __init__(self):
+        self.files_scanned = 0
+        self.folders_scanned = 0
+        self.lines_counted = 0
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the scan started"""
+        return time.perf_counter() - self.started
+
+    @property
+    def files_per_second(self) -> float:
+        """Scan throughput so far"""
+        elapsed = self.elapsed
+        return self.files_scanned / elapsed if elapsed > 0 else 0.0
+
+    def describe(self) -> str:
+        """Short human readable progress line"""
+        return (f"{self.files_scanned:,} files, {self.lines_counted:,} lines "
+                f"({self.files_per_second:,.0f} files/s)")
+
+
+class ScanEntry:
+    """A file or folder captured during a scan: a light view of one TreeTable row"""
+    __slots__ = ('table', 'row')
+
+    def __init__(self, table: TreeTable, row: int):
+        self.table = table
+        self.row = row
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, ScanEntry) and other.row == self.row and other.table is self.table
+
+    def __hash__(self) -> int:
+        return hash(self.row)
+
+    def __repr__(self) -> str:
+        return f"ScanEntry({self.path!r})"
+
+    @property
+    def name(self) -> str:
+        return self.table.name(self.row)
+
+    @property
+    def path(self) -> str:
+        """Full path, rebuilt from the parent links on every access"""
+        return self.table.path(self.row)
+
+    @property
+    def is_dir(self) -> bool:
+        return bool(self.table.flags[self.row] & FLAG_DIR)
+
+    @property
+    def is_file(self) -> bool:
+        return bool(self.table.flags[self.row] & FLAG_FILE)
+
+    @property
+    def skipped(self) -> bool:
+        """Binary or generated, never fully read"""
+        return bool(self.table.flags[self.row] & FLAG_SKIPPED)
+
+    @property
+    def size(self) -> int:
+        return self.table.size[self.row]
+
+    @property
+    def mtime(self) -> float:
+        return self.table.mtime[self.row]
+
+    @property
+    def lines(self) -> int:
+        return self.table.lines[self.row]
+
+    @property
+    def tokens(self) -> int:
+        """Estimated; summed over children for folders"""
+        return self.table.tokens[self.row]
+
+    @property
+    def error(self) -> Optional[str]:
+        return self.table.errors.get(self.row)
+
+    @property
+    def children(self) -> List['ScanEntry']:
+        """Direct children, folders first"""
+        table = self.table
+        return [ScanEntry(table, child) for child in table.children(self.row)]
+
+    @property
+    def extension(self) -> str:
+        """Lower-cased file extension"""
+        return os.path.splitext(self.name)[1].lower()
+
+
+class FolderSnapshot:
+    """In-memory view of a folder tree shared by every panel"""
+
+    def __init__(self, folder_path: str, table: TreeTable, ignore_filter: IgnoreFilter):
+        self.folder_path = folder_path
+        self.table = table
+        self.root = ScanEntry(table, ROOT_ROW)
+        self.ignore_filter = ignore_filter
+        self.token_estimator = ""  # name of the estimator behind the token counts
+        self.syscalls: Optional[Dict[str, int]] = None  # filled in debug mode
+        self.scan_started_ns = 0  # wall clock (time.time_ns) when the scan began
+
+    @property
+    def ignore_folders(self) -> List[str]:
+        """User ignore patterns the snapshot was scanned with"""
+        return self.ignore_filter.patterns
+
+    def find_folder(self, path: str) -> Optional[ScanEntry]:
+        """Look up a scanned folder by path, one path component at a time"""
+        if path == self.folder_path:
+            return self.root
+        relative_path = os.path.relpath(path, self.folder_path)
+        if relative_path == os.pardir or relative_path.startswith(os.pardir + os.sep):
+            return None
+
+        table = self.table
+        row = ROOT_ROW
+        for part in relative_path.split(os.sep):
+            row = table.find_child(row, part)
+            if row is None or not table.is_dir(row):
+                return None
+        return ScanEntry(table, row)
+
+    def parent_of(self, entry: ScanEntry) -> Optional[ScanEntry]:
+        """Folder containing entry, or None for the root"""
+        if entry.row == ROOT_ROW:
+            return None
+        return ScanEntry(self.table, self.table.parent[entry.row])
+
+    @property
+    def total_lines(self) -> int:
+        """Total lines of code in the scanned folder"""
+        return self.table.lines[ROOT_ROW]
+
+    @property
+    def total_files(self) -> int:
+        """Files with at least one line, like get_stats()['total_files'] but without a walk"""
+        return self.table.text_files
+
+    @property
+    def total_tokens(self) -> int:
+        """Estimated tokens of every text file in the scanned folder"""
+        return self.table.tokens[ROOT_ROW]
+
+    def _file_rows(self, row: int = ROOT_ROW) -> Iterator[int]:
+        """Rows of the files below a folder, each folder's files before its subfolders"""
+        table = self.table
+        flags = table.flags
+        stack = [row]
+        while stack:
+            folder = stack.pop()
+            subfolders = []
+            for child in table.children(folder):
+                if flags[child] & FLAG_DIR:
+                    subfolders.append(child)
+                else:
+                    yield child
+            stack.extend(reversed(subfolders))
+
+    def _folder_rows(self) -> Iterator[int]:
+        """Rows of every folder below the root"""
+        table = self.table
+        flags = table.flags
+        stack = list(reversed(table.children(ROOT_ROW)))
+        while stack:
+            row = stack.pop()
+            if flags[row] & FLAG_DIR:
+                yield row
+                stack.extend(reversed(table.children(row)))
+
+    def text_file_rows(self, row: int = ROOT_ROW) -> List[int]:
+        """Rows of the files below a folder that have at least one line, in iter_files order"""
+        lines = self.table.lines
+        return [child for child in self._file_rows(row) if lines[child] > 0]
+
+    def iter_files(self, entry: ScanEntry = None) -> Iterator[ScanEntry]:
+        """Yield files folder by folder, each folder's files before its subfolders"""
+        table = self.table
+        for row in self._file_rows(entry.row if entry is not None else ROOT_ROW):
+            yield ScanEntry(table, row)
+
+    def iter_folders(self) -> Iterator[ScanEntry]:
+        """Yield every folder below the root"""
+        table = self.table
+        for row in self._folder_rows():
+            yield ScanEntry(table, row)
+
+    def iter_ascii_tree(self, entry: ScanEntry = None) -> Iterator[str]:
+        """Yield the ASCII tree line by line in one pass, without recursion"""
+        for line, _kind, _row in self.iter_ascii_rows(entry):
+            yield line
+
+    def iter_ascii_rows(self, entry: ScanEntry = None, indent: str = "") -> Iterator[Tuple[str, str, int]]:
+        """Yield (line, kind, row) for the ASCII tree below entry, kind being folder, file or error
+
+        indent prefixes every line, so a subtree can be rendered where it sits in a larger tree.
+        """
+        table = self.table
+        row = entry.row if entry is not None else ROOT_ROW
+        errors = table.errors
+        if row in errors:
+            yield errors[row], "error", row
+            return
+
+        names, name_id, flags = table.names.names, table.name_id, table.flags
+        lines, tokens = table.lines, table.tokens
+        child_start, child_count = table.child_start, table.child_count
+
+        # Each frame is (next sibling row, end of the sibling block, indent)
+        stack = [(child_start[row], child_start[row] + child_count[row], indent)]
+        while stack:
+            child, end, indent = stack.pop()
+            if child >= end:
+                continue
+            stack.append((child + 1, end, indent))
+
+            is_last = child == end - 1
+            connector = "└── " if is_last else "├── "
+            name = names[name_id[child]]
+
+            if flags[child] & FLAG_DIR:
+                yield f"{indent}{connector}📁 {name} 🔢({lines[child]} total lines, ~{tokens[child]:,} tokens)\n", "folder", child
+                if child in errors:
+                    yield errors[child], "error", child
+                else:
+                    start = child_start[child]
+                    stack.append((start, start + child_count[child], indent + ("    " if is_last else "│   ")))
+            else:
+                yield f"{indent}{connector}📄 {name} 📊({lines[child]} lines, ~{tokens[child]:,} tokens)\n", "file", child
+
+    def ascii_line(self, row: int, indent: str, is_last: bool) -> str:
+        """One line of iter_ascii_rows for a file or folder row, without its newline"""
+        table = self.table
+        connector = "└── " if is_last else "├── "
+        name = table.name(row)
+        if table.flags[row] & FLAG_DIR:
+            return f"{indent}{connector}📁 {name} 🔢({table.lines[row]} total lines, ~{table.tokens[row]:,} tokens)"
+        return f"{indent}{connector}📄 {name} 📊({table.lines[row]} lines, ~{table.tokens[row]:,} tokens)"
+
+    def to_ascii_tree(self, entry: ScanEntry = None) -> Tuple[str, int]:
+        """Render the ASCII tree representation of the snapshot"""
+        entry = entry or self.root
+        return "".join(self.iter_ascii_tree(entry)), entry.lines
+
+    def exportable_bytes(self) -> int:
+        """Size on disk of the files an export would include"""
+        size, lines = self.table.size, self.table.lines
+        return sum(size[row] for row in self._file_rows() if lines[row] > 0)
+
+    def get_stats(self) -> Dict:
+        """Get comprehensive folder statistics (see compute_folder_stats)"""
+        stats = compute_folder_stats(self.table)
+        stats['token_estimator'] = self.token_estimator
+
+        # Memory held by the columnar tree model
+        stats['tree_rows'] = len(self.table)
+        stats['tree_bytes'] = self.table.nbytes()
+
+        if self.syscalls is not None:
+            stats['syscalls'] = dict(self.syscalls)
+
+        return stats
+
+
+class RescanResult:
+    """What an incremental rescan changed, for patching the views"""
+
+    def __init__(self, relisted: List[ScanEntry], totals: List[ScanEntry], new_folders: Set[int],
+                 removed_folders: Set[int]):
+        self.relisted = relisted                # folders whose children were listed again, parents first
+        self.totals = totals                    # relisted folders and their ancestors, re-totalled; parents first
+        self.new_folders = new_folders          # rows of folders that appeared, scanned with their whole subtree
+        self.removed_folders = removed_folders  # former rows of subfolders that are gone
+
+    def __bool__(self) -> bool:
+        return bool(self.relisted)
+
+
+class FolderScanner:
+    """Walks a folder once and records everything the views need"""
+
+    def __init__(self, file_manager, progress_callback: Callable[[ScanProgress], None] = None,
+                 cancel_event=None, count_syscalls: bool = DEBUG_SYSCALLS, dedup: bool = DEDUP_FILES):
+        self.file_manager = file_manager
+        self.dedup = dedup  # hash files that share a size while counting them
+        self.progress_callback = progress_callback
+        self.cancel_event = cancel_event
+        self.count_syscalls = count_syscalls
+        self.syscalls = {'scandir': 0, 'stat': 0}
+        self.ignore_filter: Optional[IgnoreFilter] = None
+        self.table: Optional[TreeTable] = None
+        self.progress = ScanProgress()
+        self._pending_files: List[Tuple[int, str, os.stat_result]] = []  # (row, path, stat)
+        self._file_sizes: Counter = Counter()  # files queued per size, to spot possible duplicates
+        self._last_report = 0
+
+    def scan(self, folder_path: str, ignore_folders: List[str] = None, use_gitignore: bool = True) -> FolderSnapshot:
+        """Scan folder_path into a FolderSnapshot, skipping ignored entries before descending"""
+        if ignore_folders is None:
+            ignore_folders = []
+        started_ns = time.time_ns()
+
+        self.progress = ScanProgress()
+        self.syscalls = {'scandir': 0, 'stat': 0}
+        self._pending_files = []
+        self._file_sizes = Counter()
+        self._last_report = 0
+        self.ignore_filter = IgnoreFilter(folder_path, ignore_folders, use_gitignore)
+        self.table = TreeTable(folder_path)
+
+        self._scan_subtree(ROOT_ROW, folder_path, ())
+        self._count_pending_files()
+        with instrumentation.phase("scan/roll up"):
+            self._roll_up_lines(ROOT_ROW)
+        self._report()
+        instrumentation.count("folders scanned", self.progress.folders_scanned)
+        instrumentation.count("files scanned", self.progress.files_scanned)
+
+        snapshot = FolderSnapshot(folder_path, self.table, self.ignore_filter)
+        snapshot.token_estimator = self.file_manager.token_estimator.name
+        snapshot.scan_started_ns = started_ns
+        if self.count_syscalls:
+            snapshot.syscalls = dict(self.syscalls)
+        return snapshot
+
+    def rescan(self, snapshot: FolderSnapshot, changed_paths) -> RescanResult:
+        """Update snapshot in place for changed_paths, relisting only the folders that contain them"""
+        self.ignore_filter = snapshot.ignore_filter
+        self.table = table = snapshot.table
+        targets = set()
+        for path in changed_paths:
+            for candidate in (path, os.path.dirname(path)):
+                if snapshot.find_folder(candidate) is not None:
+                    targets.add(candidate)
+
+        # Parents first: relisting a folder moves its subfolders to new rows, so each
+        # target is looked up again when its turn comes (removed ones are gone)
+        rescanned = []
+        new_subtrees = []
+        removed = []
+        for path in sorted(targets, key=lambda p: p.count(os.sep)):
+            folder = snapshot.find_folder(path)
+            if folder is None:
+                continue
+            added, gone = self._rescan_folder(folder.row, path)
+            new_subtrees.extend(added)
+            removed.extend(gone)
+            rescanned.append(folder.row)
+
+        self._count_pending_files()
+        for subtree in new_subtrees:
+            self._roll_up_lines(subtree)
+
+        # Re-total every rescanned folder and its ancestors, deepest first
+        affected = set()
+        for row in rescanned:
+            while row >= 0 and row not in affected:
+                affected.add(row)
+                row = table.parent[row]
+        ordered = sorted(affected, key=table.depth, reverse=True)
+        for row in ordered:
+            table.roll_up(row)
+        ordered.reverse()
+        return RescanResult(
+            [ScanEntry(table, row) for row in rescanned],
+            [ScanEntry(table, row) for row in ordered],
+            set(new_subtrees),
+            set(removed)
+        )
+
+    def _rescan_folder(self, row: int, path: str) -> Tuple[List[int], List[int]]:
+        """Relist one folder, keeping the subtrees of unchanged subfolders
+
+        Returns the rows of new subfolders and the former rows of removed ones.
+
+        The relisted children get fresh rows; the old ones are left unreferenced
+        until the next full scan.
+        """
+        table = self.table
+        old_folders = {table.name(child): child for child in table.children(row) if table.is_dir(child)}
+        table.release_children(row)
+        table.errors.pop(row, None)
+        parent_chain = ()
+        if path != self.ignore_filter.root_path:
+            parent_chain = self.ignore_filter.chain_for_path(os.path.dirname(path))
+        chain, subfolders = self._scan_folder(row, path, parent_chain)
+
+        new_subtrees = []
+        for child, child_path in subfolders:
+            previous = old_folders.pop(table.name(child), None)
+            if previous is not None:
+                table.move_children(previous, child)
+            else:
+                self._scan_subtree(child, child_path, chain)
+                new_subtrees.append(child)
+        for previous in old_folders.values():
+            table.release_subtree(previous)  # subfolder removed
+        return new_subtrees, list(old_folders.values())
+
+    def _scan_subtree(self, row: int, path: str, parent_chain: IgnoreChain):
+        """Scan a folder and every folder below it"""
+        # Depth-first without recursion, so arbitrarily deep trees are fine;
+        # each folder carries the ignore rules of its parent
+        stack = [(row, path, parent_chain)]
+        while stack:
+            folder, folder_path, chain = stack.pop()
+            chain, subfolders = self._scan_folder(folder, folder_path, chain)
+            stack.extend(reversed([(child, child_path, chain) for child, child_path in subfolders]))
+
+    def _check_cancelled(self):
+        """Abort the scan if cancellation was requested"""
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise ScanCancelled()
+
+    def _report(self):
+        """Send the current counters to the progress callback"""
+        if self.progress_callback:
+            self.progress_callback(self.progress)
+
+    def _scan_folder(self, row: int, path: str,
+                     parent_chain: IgnoreChain) -> Tuple[IgnoreChain, List[Tuple[int, str]]]:
+        """Add the children of a folder from one scandir call and queue its files for counting
+
+        Returns the ignore rules in effect inside the folder, for its subfolders,
+        and the (row, path) of each subfolder.
+        """
+        self._check_cancelled()
+        self.progress.folders_scanned += 1
+        if self.count_syscalls:
+            self.syscalls['scandir'] += 1
+        try:
+            with os.scandir(path) as dir_entries:
+                dir_entries = list(dir_entries)
+        except PermissionError:
+            self.table.errors[row] = "Permission denied"
+            return parent_chain, []
+        except (FileNotFoundError, NotADirectoryError):
+            # Removed since its parent was listed: shown empty until the parent is listed again
+            return parent_chain, []
+
+        ignore_filter = self.ignore_filter
+        chain = parent_chain
+        if ignore_filter.use_gitignore:
+            chain = ignore_filter.chain_for_folder(path, parent_chain, {e.name for e in dir_entries})
+        is_ignored = ignore_filter.is_ignored
+        listed = [(dir_entry, self._is_dir(dir_entry)) for dir_entry in dir_entries]
+        items = [self._make_entry(dir_entry, is_dir) for dir_entry, is_dir in listed
+                 if not is_ignored(dir_entry.path, dir_entry.name, is_dir, chain)]
+
+        # Sort items: folders first, then files; siblings take consecutive rows
+        items.sort(key=lambda item: child_order(item[0], item[2]))
+
+        table = self.table
+        table.child_start[row] = len(table)
+        table.child_count[row] = len(items)
+        subfolders = []
+        for name, child_path, flags, size, mtime, st in items:
+            child = table.add_row(name, row, flags, size, mtime)
+            if flags & FLAG_DIR:
+                subfolders.append((child, child_path))
+                continue
+            self.progress.files_scanned += 1
+            if st is not None:
+                self._pending_files.append((child, child_path, st))
+                if len(self._pending_files) >= LINE_COUNT_BATCH_SIZE:
+                    self._count_pending_files()
+        return chain, subfolders
+
+    def _count_pending_files(self):
+        """Count lines and tokens of the queued files in one batch on the worker pool"""
+        self._check_cancelled()
+        if not self._pending_files:
+            return
+
+        pending = self._pending_files
+        self._pending_files = []
+        digest_sizes = ()
+        if self.dedup:
+            # Files sharing a size may be duplicates, so they are hashed while being counted.
+            # Only the first file of a size, when counted in an earlier batch, is left to
+            # be hashed by the statistics or export that needs it.
+            self._file_sizes.update(st.st_size for _, _, st in pending)
+            digest_sizes = {st.st_size for _, _, st in pending if self._file_sizes[st.st_size] > 1}
+        with instrumentation.phase("scan/count lines"):
+            counts = self.file_manager.count_files_many(
+                [path for _, path, _ in pending],
+                [st for _, _, st in pending],
+                digest_sizes
+            )
+
+        table = self.table
+        for (row, _, _), (lines, tokens) in zip(pending, counts):
+            if lines < 0:
+                table.flags[row] |= FLAG_SKIPPED
+                lines = 0
+            table.lines[row] = lines
+            table.tokens[row] = tokens
+            if lines > 0:
+                table.text_files += 1
+            self.progress.lines_counted += lines
+
+        if self.progress.files_scanned - self._last_report >= PROGRESS_BATCH_SIZE:
+            self._last_report = self.progress.files_scanned
+            self._report()
+
+    def _roll_up_lines(self, row: int):
+        """Sum file line and token counts into every folder, children before parents"""
+        table = self.table
+        flags = table.flags
+        folders = [row]
+        for folder in folders:
+            folders.extend(child for child in table.children(folder) if flags[child] & FLAG_DIR)
+
+        for folder in reversed(folders):
+            table.roll_up(folder)
+
+    def _is_dir(self, dir_entry: os.DirEntry) -> bool:
+        """Whether an entry is a folder; broken or looping symlinks count as files"""
+        try:
+            # is_dir() is answered from the directory listing unless the entry is a symlink
+            if self.count_syscalls and dir_entry.is_symlink():
+                self.syscalls['stat'] += 1
+            return dir_entry.is_dir()
+        except OSError:
+            return False
+
+    def _make_entry(self, dir_entry: os.DirEntry,
+                    is_dir: bool) -> Tuple[str, str, int, int, float, Optional[os.stat_result]]:
+        """(name, path, flags, size, mtime, stat) of a DirEntry; only files (and symlinks) cost a stat call"""
+        name, path = dir_entry.name, dir_entry.path
+        if is_dir:
+            return name, path, FLAG_DIR, 0, 0.0, None
+        try:
+            if self.count_syscalls:
+                self.syscalls['stat'] += 1
+            st = dir_entry.stat()
+        except OSError:
+            return name, path, 0, 0, 0.0, None
+
+        flags = FLAG_FILE if stat.S_ISREG(st.st_mode) else 0
+        return name, path, flags, st.st_size, st.st_mtime, st
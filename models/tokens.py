@@ -0,0 +1,69 @@
+"""
+Token estimates for sizing a dump against an LLM context window
+"""
+import math
+from typing import Dict, Type
+from utils.constants import TOKEN_ESTIMATOR, TOKEN_BYTES_PER_TOKEN, TIKTOKEN_ENCODING
+
+
+class TokenEstimator:
+    """Estimates the tokens of a file while it is being read for line counting"""
+
+    # Estimators that need the decoded text get every chunk through count_text;
+    # the others only see the number of bytes read
+    needs_text = False
+    name = "none"
+
+    def count_bytes(self, byte_count: int) -> int:
+        """Tokens for a file of byte_count bytes"""
+        return 0
+
+    def count_text(self, text: str) -> int:
+        """Tokens in one decoded chunk of a file"""
+        return 0
+
+
+class ByteTokenEstimator(TokenEstimator):
+    """Cheap approximation: a fixed number of bytes per token"""
+
+    def __init__(self, bytes_per_token: float = TOKEN_BYTES_PER_TOKEN):
+        self.bytes_per_token = bytes_per_token
+        self.name = f"bytes/{bytes_per_token:g}"
+
+    def count_bytes(self, byte_count: int) -> int:
+        return math.ceil(byte_count / self.bytes_per_token)
+
+
+class TiktokenEstimator(TokenEstimator):
+    """Exact counts with an OpenAI tiktoken encoding (optional dependency)"""
+    needs_text = True
+
+    def __init__(self, encoding_name: str = TIKTOKEN_ENCODING):
+        import tiktoken  # raises ImportError when the package is not installed
+        self.encoding_name = encoding_name
+        self.name = f"tiktoken/{encoding_name}"
+        self._encoding = tiktoken.get_encoding(encoding_name)
+
+    def __getstate__(self):
+        # Encodings are not picklable; process-pool workers load their own
+        return {'encoding_name': self.encoding_name, 'name': self.name, '_encoding': None}
+
+    def count_text(self, text: str) -> int:
+        if self._encoding is None:
+            import tiktoken
+            self._encoding = tiktoken.get_encoding(self.encoding_name)
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+
+ESTIMATORS: Dict[str, Type[TokenEstimator]] = {
+    "bytes": ByteTokenEstimator,
+    "tiktoken": TiktokenEstimator,
+}
+
+
+def create_token_estimator(name: str = TOKEN_ESTIMATOR) -> TokenEstimator:
+    """Build an estimator by name, falling back to the byte approximation if unavailable"""
+    try:
+        return ESTIMATORS[name]()
+    except (KeyError, ImportError, ValueError):
+        return ByteTokenEstimator()
@@ -0,0 +1,248 @@
+"""
+Columnar storage for scanned trees: one row per file or folder, a few bytes per column
+"""
+import os
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Bits of the flags column
+FLAG_DIR = 1
+FLAG_FILE = 2      # regular file (not a socket, device, ...)
+FLAG_SKIPPED = 4   # binary or generated, never fully read
+
+ROOT_ROW = 0
+
+
+def child_order(name: str, flags: int) -> Tuple[bool, str, str]:
+    """Sort key of siblings: folders first, then files, by case-insensitive name"""
+    return bool(flags & FLAG_FILE), name.lower(), name
+
+
+def splice(items, edits: Sequence[Tuple[int, int, Sequence]]):
+    """Copy of a list or array with each (start, stop, replacement) edit applied
+
+    Edits are sorted by start and do not overlap; everything between them is copied once.
+    """
+    result = items[:0]
+    position = 0
+    for start, stop, replacement in edits:
+        result.extend(items[position:start])
+        result.extend(replacement)
+        position = stop
+    result.extend(items[position:])
+    return result
+
+
+class NameTable:
+    """Interned file and folder names, each distinct name stored once"""
+
+    def __init__(self):
+        self.names: List[str] = []
+        self.ids: Dict[str, int] = {}
+        self.extensions: List[str] = []        # distinct lower-cased extensions ("" for none)
+        self._extension_ids: Dict[str, int] = {}
+        self._name_extensions = array('I')     # extension id of each name, filled lazily
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def intern(self, name: str) -> int:
+        """Id of name, adding it on first use"""
+        name_id = self.ids.get(name)
+        if name_id is None:
+            name_id = len(self.names)
+            self.names.append(name)
+            self.ids[name] = name_id
+        return name_id
+
+    def lookup(self, name: str) -> Optional[int]:
+        """Id of name, or None if no entry has it"""
+        return self.ids.get(name)
+
+    def extension_ids(self) -> array:
+        """Extension id of every name, indexed by name id; only names added since the last call are split"""
+        name_extensions = self._name_extensions
+        for name in self.names[len(name_extensions):]:
+            extension = os.path.splitext(name)[1].lower()
+            extension_id = self._extension_ids.get(extension)
+            if extension_id is None:
+                extension_id = len(self.extensions)
+                self.extensions.append(extension)
+                self._extension_ids[extension] = extension_id
+            name_extensions.append(extension_id)
+        return name_extensions
+
+
+class TreeTable:
+    """Rows of a folder tree in parallel arrays; full paths are rebuilt from parent links
+
+    The children of a folder are always stored in consecutive rows, sorted folders
+    first, so a folder only records where its block starts and how long it is.
+    Row 0 is the scanned folder itself.
+    """
+
+    def __init__(self, root_path: str):
+        self.root_path = root_path
+        self.names = NameTable()
+        self.parent = array('i')
+        self.name_id = array('I')
+        self.flags = bytearray()
+        self.size = array('q')
+        self.mtime = array('d')
+        self.lines = array('q')
+        self.tokens = array('q')   # estimated; summed over children for folders
+        self.child_start = array('i')
+        self.child_count = array('i')
+        self.errors: Dict[int, str] = {}  # rare, so kept out of the columns
+        self.dead_rows = 0                 # rows orphaned by relisting folders in place
+        self.text_files = 0                # reachable files with at least one line, kept up to date by the scanner
+        self.add_row(os.path.basename(root_path), -1, FLAG_DIR)
+
+    def __len__(self) -> int:
+        return len(self.parent)
+
+    def add_row(self, name: str, parent: int, flags: int, size: int = 0, mtime: float = 0.0) -> int:
+        """Append one entry and return its row"""
+        row = len(self.parent)
+        self.parent.append(parent)
+        self.name_id.append(self.names.intern(name))
+        self.flags.append(flags)
+        self.size.append(size)
+        self.mtime.append(mtime)
+        self.lines.append(0)
+        self.tokens.append(0)
+        self.child_start.append(0)
+        self.child_count.append(0)
+        return row
+
+    def name(self, row: int) -> str:
+        """File or folder name of a row"""
+        return self.names.names[self.name_id[row]]
+
+    def path(self, row: int) -> str:
+        """Full path of a row, joined from the names of its ancestors"""
+        names = self.names.names
+        parts = []
+        while row != ROOT_ROW:
+            parts.append(names[self.name_id[row]])
+            row = self.parent[row]
+        if not parts:
+            return self.root_path
+        parts.reverse()
+        return os.path.join(self.root_path, *parts)
+
+    def depth(self, row: int) -> int:
+        """Number of folders between the root and a row"""
+        depth = 0
+        while row != ROOT_ROW:
+            row = self.parent[row]
+            depth += 1
+        return depth
+
+    def is_dir(self, row: int) -> bool:
+        return bool(self.flags[row] & FLAG_DIR)
+
+    def children(self, row: int) -> range:
+        """Rows of the direct children of a folder"""
+        start = self.child_start[row]
+        return range(start, start + self.child_count[row])
+
+    def find_child(self, row: int, name: str) -> Optional[int]:
+        """Row of the child of a folder called name"""
+        name_id = self.names.lookup(name)
+        if name_id is None:
+            return None
+        ids = self.name_id
+        for child in self.children(row):
+            if ids[child] == name_id:
+                return child
+        return None
+
+    def move_children(self, source: int, target: int):
+        """Give target the child block, totals and error of source (a relisted folder kept its subtree)"""
+        self.child_start[target] = self.child_start[source]
+        self.child_count[target] = self.child_count[source]
+        self.lines[target] = self.lines[source]
+        self.tokens[target] = self.tokens[source]
+        error = self.errors.pop(source, None)
+        if error is not None:
+            self.errors[target] = error
+        for child in self.children(target):
+            self.parent[child] = target
+
+    def release_children(self, row: int):
+        """Detach a folder's child block before it is relisted; the old rows stay unused"""
+        flags, lines = self.flags, self.lines
+        for child in self.children(row):
+            if not flags[child] & FLAG_DIR and lines[child] > 0:
+                self.text_files -= 1
+        self.dead_rows += self.child_count[row]
+        self.child_count[row] = 0
+
+    def release_subtree(self, row: int):
+        """Detach everything below a folder that no longer exists"""
+        stack = [row]
+        while stack:
+            folder = stack.pop()
+            stack.extend(child for child in self.children(folder) if self.flags[child] & FLAG_DIR)
+            self.release_children(folder)
+
+    def sort_key(self, row: int, files_first: bool = False) -> tuple:
+        """Position of a row in a depth-first walk, comparable between any two rows
+
+        Built from names rather than row numbers, so the key of a row replaced by a
+        relisting still sorts where its path does. Siblings follow child_order; with
+        files_first a folder's files come before its subfolders (FolderSnapshot.iter_files).
+        """
+        names, name_id, flags, parent = self.names.names, self.name_id, self.flags, self.parent
+        parts = []
+        while row != ROOT_ROW:
+            row_flags = flags[row]
+            parts.append((files_first and bool(row_flags & FLAG_DIR),) + child_order(names[name_id[row]], row_flags))
+            row = parent[row]
+        parts.reverse()
+        return tuple(parts)
+
+    def find_span(self, rows: Sequence[int], row: int, files_first: bool = False,
+                  start: int = 0, stop: int = None) -> Tuple[int, int]:
+        """[first, last) of the items of rows, in walk order, that are row itself or lie below it"""
+        prefix = self.sort_key(row, files_first)
+        depth = len(prefix)
+        stop = len(rows) if stop is None else stop
+
+        low, high = start, stop
+        while low < high:
+            middle = (low + high) // 2
+            if self.sort_key(rows[middle], files_first)[:depth] < prefix:
+                low = middle + 1
+            else:
+                high = middle
+        first = low
+
+        high = stop
+        while low < high:
+            middle = (low + high) // 2
+            if self.sort_key(rows[middle], files_first)[:depth] <= prefix:
+                low = middle + 1
+            else:
+                high = middle
+        return first, low
+
+    @property
+    def wasted_fraction(self) -> float:
+        """Share of rows no longer reachable from the root (a full scan starts over at 0)"""
+        return self.dead_rows / len(self.parent)
+
+    def roll_up(self, row: int):
+        """Recompute a folder's line and token totals from its children"""
+        start = self.child_start[row]
+        end = start + self.child_count[row]
+        self.lines[row] = sum(self.lines[start:end])
+        self.tokens[row] = sum(self.tokens[start:end])
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the columns and the name table"""
+        columns = (self.parent, self.name_id, self.size, self.mtime, self.lines, self.tokens,
+                   self.child_start, self.child_count)
+        total = sum(column.itemsize * len(column) for column in columns) + len(self.flags)
+        return total + sum(len(name) + 49 for name in self.names.names)
@@ -0,0 +1,240 @@
+"""
+Filesystem watching for incremental refresh (inotify on Linux, polling elsewhere)
+"""
+import ctypes
+import ctypes.util
+import errno
+import os
+import struct
+import sys
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Set
+from models.line_cache import file_signature
+from utils.constants import WATCH_POLL_BATCH_SIZE, WATCH_MTIME_SLACK_SECONDS
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MODIFY | IN_ATTRIB | IN_CREATE | IN_DELETE |
+              IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+EVENT_HEADER = struct.Struct("iIII")
+
+# Signature of a path not stat'ed yet since the scan
+UNSEEN = ()
+
+
+class FolderWatcher(ABC):
+    """Reports paths that changed below a snapshot since the last poll"""
+
+    # Set when changes were lost (e.g. the kernel queue overflowed); a full reload is needed
+    overflowed = False
+
+    @abstractmethod
+    def poll(self) -> Set[str]:
+        """Return the paths that changed since the last call"""
+
+    def track_folders(self, folders):
+        """Start tracking relisted folder entries and any new subfolders below them"""
+
+    def close(self):
+        """Release watcher resources"""
+
+
+class InotifyWatcher(FolderWatcher):
+    """Linux inotify watcher with one watch per scanned folder"""
+
+    def __init__(self, folders: List[str]):
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self._folders_by_wd: Dict[int, str] = {}
+        self._watched: Set[str] = set()
+        self.overflowed = False
+        try:
+            self._add_watches(folders)
+        except OSError:
+            self.close()
+            raise
+
+    def track_folders(self, folders):
+        """Watch the given folders and their new subfolders; watched subfolders are not walked again"""
+        paths = []
+        stack = list(folders)
+        while stack:
+            entry = stack.pop()
+            if entry.path not in self._watched:
+                paths.append(entry.path)
+            # Everything below an unwatched folder is new as well
+            stack.extend(child for child in entry.children if child.is_dir and child.path not in self._watched)
+        self._add_watches(paths)
+
+    def _add_watches(self, folders: List[str]):
+        """Add an inotify watch for every folder"""
+        for folder_path in folders:
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(folder_path), WATCH_MASK)
+            if wd < 0:
+                error = ctypes.get_errno()
+                if error in (errno.ENOENT, errno.EACCES, errno.ENOTDIR):
+                    continue
+                # ENOSPC: fs.inotify.max_user_watches exhausted
+                raise OSError(error, os.strerror(error), folder_path)
+            self._folders_by_wd[wd] = folder_path
+            self._watched.add(folder_path)
+
+    def poll(self) -> Set[str]:
+        """Drain pending inotify events without blocking"""
+        changed = set()
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, name_length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + name_length].rstrip(b"\0")
+                offset += name_length
+
+                if mask & IN_Q_OVERFLOW:
+                    self.overflowed = True
+                    continue
+
+                folder_path = self._folders_by_wd.get(wd)
+                if folder_path is None:
+                    continue
+                if mask & IN_IGNORED:
+                    del self._folders_by_wd[wd]
+                    self._watched.discard(folder_path)
+                    continue
+
+                if name:
+                    changed.add(os.path.join(folder_path, os.fsdecode(name)))
+                else:
+                    changed.add(folder_path)
+        return changed
+
+    def close(self):
+        """Close the inotify descriptor (drops every watch)"""
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingWatcher(FolderWatcher):
+    """Portable fallback that re-stats a slice of the snapshot on every poll"""
+
+    def __init__(self, snapshot):
+        self.overflowed = False
+        self._signatures: Dict[str, Optional[tuple]] = {}
+        self._folders: Set[str] = set()
+        self._paths: List[str] = []
+        self._cursor = 0
+        # Anything modified after this, or gone, has changed since the scan
+        self._scanned_ns = snapshot.scan_started_ns - WATCH_MTIME_SLACK_SECONDS * 10**9
+        self._queue_unseen(snapshot.root)
+
+    def _stat_signature(self, path: str) -> Optional[tuple]:
+        """Signature used to notice a change; folder mtimes change on create/delete"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns,) if path in self._folders else file_signature(st)
+
+    def _queue_unseen(self, root):
+        """Queue every path of the snapshot without a stat call; poll gives each its first signature"""
+        stack = [root]
+        while stack:
+            entry = stack.pop()
+            for child in entry.children:
+                if child.is_dir:
+                    stack.append(child)
+                else:
+                    self._paths.append(child.path)
+                    self._signatures[child.path] = UNSEEN
+            self._folders.add(entry.path)
+            self._paths.append(entry.path)
+            self._signatures[entry.path] = UNSEEN
+
+    def _track(self, path: str, is_folder: bool):
+        """Record the current signature of path"""
+        if is_folder:
+            self._folders.add(path)
+        if path not in self._signatures:
+            self._paths.append(path)
+        self._signatures[path] = self._stat_signature(path)
+
+    def track_folders(self, folders):
+        """Record signatures for the folders, their files and any untracked subfolders"""
+        stack = list(folders)
+        while stack:
+            entry = stack.pop()
+            self._track(entry.path, True)
+            for child in entry.children:
+                if child.is_dir:
+                    if child.path not in self._signatures:
+                        stack.append(child)
+                else:
+                    self._track(child.path, False)
+
+    def poll(self) -> Set[str]:
+        """Check the next WATCH_POLL_BATCH_SIZE paths for changes; removed paths stop being tracked"""
+        changed = set()
+        if not self._paths:
+            return changed
+
+        end = min(self._cursor + WATCH_POLL_BATCH_SIZE, len(self._paths))
+        kept = []
+        for path in self._paths[self._cursor:end]:
+            new = self._stat_signature(path)
+            old = self._signatures.get(path)
+            if old == UNSEEN:
+                # First look since the scan: compare with the time the scan began
+                if new is None or (new[0] if path in self._folders else new[1]) >= self._scanned_ns:
+                    changed.add(path)
+            elif new != old:
+                changed.add(path)
+            if new is None:
+                # Gone: relisting its folder tracks it again if it comes back
+                del self._signatures[path]
+                self._folders.discard(path)
+                continue
+            self._signatures[path] = new
+            kept.append(path)
+
+        self._paths[self._cursor:end] = kept
+        end = self._cursor + len(kept)
+        self._cursor = 0 if end >= len(self._paths) else end
+        return changed
+
+
+def create_watcher(snapshot) -> FolderWatcher:
+    """Use inotify when the platform has it, polling otherwise"""
+    if sys.platform.startswith("linux"):
+        folders = [snapshot.root.path] + [entry.path for entry in snapshot.iter_folders()]
+        try:
+            return InotifyWatcher(folders)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(snapshot)
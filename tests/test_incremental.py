@@ -0,0 +1,162 @@
+"""
+Incremental refresh against full rescans and renders, on randomly changing temporary trees
+
+Run with: python -m unittest discover tests
+"""
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from array import array
+from models.file_manager import FileManager
+from views.components.ascii_panel import AsciiPanel
+from views.components.buttons_panel import ButtonsPanel
+
+SEEDS = 25
+STEPS = 30
+NAMES = ["a", "B", "c", "d", "e", "Zed", "x.py", "y.txt", "m.md", "b", "A"]
+
+
+class HeadlessAsciiPanel(AsciiPanel):
+    """ASCII panel without widgets, kept in virtual mode so only the buffer and its rows change"""
+
+    def __init__(self):
+        self.buffer = None
+        self.table = None
+        self.line_rows = array('i')
+        self.has_errors = False
+        self.virtual = True
+        self.top_line = 0
+        self.full_redraws = 0
+
+    def display_ascii_tree(self, snapshot):
+        self.buffer = self.render(snapshot)
+
+    def update_ascii_tree(self, snapshot):
+        self.full_redraws += 1
+        self.buffer = self.render(snapshot)
+
+    def show_window(self, top_line):
+        self.top_line = top_line
+
+
+class HeadlessButtonsPanel(ButtonsPanel):
+    """Buttons panel without widgets: only the file rows are kept"""
+
+    def __init__(self):
+        self.table = None
+        self.file_rows = array('i')
+        self.full_reloads = 0
+
+    def refresh_buttons(self, snapshot):
+        self.full_reloads += 1
+        self._load_rows(snapshot)
+
+    def _invalidate_rows(self):
+        pass
+
+    def _update_scroll_region(self):
+        pass
+
+    def _render_visible_rows(self):
+        pass
+
+
+def mutate(rng: random.Random, root: str, create_only: bool = False) -> set:
+    """Create, extend, edit or delete one random entry; returns the paths touched"""
+    folders = [folder for folder, _, _ in os.walk(root)]
+    folder = rng.choice(folders)
+    operation = rng.random()
+    if create_only or operation < 0.4:
+        path = os.path.join(folder, rng.choice(NAMES) + rng.choice(["", "1", "2"]))
+        if os.path.isdir(path):
+            return set()
+        if os.path.isfile(path) or rng.random() >= 0.3:
+            with open(path, "a") as file:
+                file.write("line\n" * rng.randint(0, 5))
+            return {path}
+        os.mkdir(path)
+        if rng.random() < 0.5:
+            with open(os.path.join(path, "inner.py"), "w") as file:
+                file.write("x = 1\n")
+        return {path}
+    if operation < 0.7:
+        names = os.listdir(folder)
+        if not names:
+            return set()
+        path = os.path.join(folder, rng.choice(names))
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+        return {path}
+    files = [os.path.join(parent, name) for parent, _, names in os.walk(root) for name in names]
+    if not files:
+        return set()
+    path = rng.choice(files)
+    with open(path, "a") as file:
+        file.write("edit\n")
+    return {path}
+
+
+class IncrementalRefreshTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.file_manager = FileManager()
+
+    def tearDown(self):
+        self.file_manager.close()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_random_changes_match_full_scan_and_render(self):
+        for seed in range(SEEDS):
+            with self.subTest(seed=seed):
+                self._check_seed(seed)
+
+    def _check_seed(self, seed: int):
+        rng = random.Random(seed)
+        shutil.rmtree(self.root)
+        os.mkdir(self.root)
+        for _ in range(60):
+            mutate(rng, self.root, create_only=True)
+
+        snapshot = self.file_manager.scan_folder(self.root, [])
+        ascii_panel = HeadlessAsciiPanel()
+        ascii_panel.display_ascii_tree(snapshot)
+        buttons_panel = HeadlessButtonsPanel()
+        buttons_panel.refresh_buttons(snapshot)
+        buttons_panel.full_reloads = 0
+        updates = 0
+
+        for step in range(STEPS):
+            changed = set()
+            for _ in range(rng.randint(1, 4)):
+                changed |= mutate(rng, self.root)
+            # Like inotify: an event for the entry and one for the folder holding it
+            events = changed | {os.path.dirname(path) for path in changed}
+            result = self.file_manager.apply_changes(snapshot, events)
+            if not result:
+                continue
+            updates += 1
+            buttons_panel.update_folders(snapshot, result)
+            ascii_panel.update_folders(snapshot, result)
+
+            context = f"seed {seed}, step {step}"
+            fresh = self.file_manager.scan_folder(self.root, [])
+            self.assertEqual(snapshot.to_ascii_tree(), fresh.to_ascii_tree(), context)
+            self.assertEqual(snapshot.total_files, snapshot.get_stats()['total_files'], context)
+            self.assertEqual(list(buttons_panel.file_rows), snapshot.text_file_rows(), context)
+
+            full = HeadlessAsciiPanel()
+            full.display_ascii_tree(snapshot)
+            self.assertEqual(ascii_panel.buffer.get_text(), full.buffer.get_text(), context)
+            self.assertEqual(list(ascii_panel.line_rows), list(full.line_rows), context)
+
+        # The patchers, not their full-redraw fallbacks, handled most updates
+        self.assertLess(buttons_panel.full_reloads, max(updates, 1))
+        self.assertLess(ascii_panel.full_redraws, max(updates, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+"""
+Background work on a worker thread with results delivered on the Tk loop
+"""
+import queue
+import threading
+from utils.constants import TASK_POLL_INTERVAL_MS
+
+
+class BackgroundTask:
+    """Runs work(task) on a daemon thread and dispatches callbacks via root.after"""
+
+    def __init__(self, root, work, on_done, on_progress=None, on_error=None, on_cancel=None):
+        self.root = root
+        self.work = work
+        self.on_done = on_done
+        self.on_progress = on_progress
+        self.on_error = on_error
+        self.on_cancel = on_cancel
+        self.cancel_event = threading.Event()
+        self._queue = queue.Queue()
+        self._finished = False
+
+    @property
+    def running(self) -> bool:
+        """Whether the task has not delivered its outcome yet"""
+        return not self._finished
+
+    def start(self):
+        """Start the worker thread and begin polling for its results"""
+        worker = threading.Thread(target=self._run, daemon=True)
+        worker.start()
+        self.root.after(TASK_POLL_INTERVAL_MS, self._poll)
+
+    def cancel(self):
+        """Ask the worker to stop at its next checkpoint"""
+        self.cancel_event.set()
+
+    def report(self, progress):
+        """Queue a progress update (called from the worker thread)"""
+        self._queue.put(("progress", progress))
+
+    def _run(self):
+        """Worker thread body"""
+        try:
+            result = self.work(self)
+        except Exception as e:
+            if self.cancel_event.is_set():
+                self._queue.put(("cancelled", None))
+            else:
+                self._queue.put(("error", e))
+        else:
+            if self.cancel_event.is_set():
+                self._queue.put(("cancelled", None))
+            else:
+                self._queue.put(("done", result))
+
+    def _poll(self):
+        """Drain queued events on the Tk thread, coalescing progress updates"""
+        latest_progress = None
+        outcome = None
+
+        while True:
+            try:
+                kind, payload = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                latest_progress = payload
+            else:
+                outcome = (kind, payload)
+
+        if latest_progress is not None and self.on_progress:
+            self.on_progress(latest_progress)
+
+        if outcome is None:
+            self.root.after(TASK_POLL_INTERVAL_MS, self._poll)
+            return
+
+        self._finished = True
+        kind, payload = outcome
+        if kind == "done":
+            self.on_done(payload)
+        elif kind == "error" and self.on_error:
+            self.on_error(payload)
+        elif kind == "cancelled" and self.on_cancel:
+            self.on_cancel()
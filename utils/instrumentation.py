@@ -0,0 +1,190 @@
+"""
+Optional per-phase timing, counters and cProfile data for the last operation
+"""
+import threading
+import time
+from typing import Dict, List, Optional
+from utils.constants import INSTRUMENTATION_ENABLED, PROFILING_ENABLED
+
+
+class OperationRecord:
+    """Timings and counters gathered during one user operation"""
+    __slots__ = ('name', 'started', 'wall_seconds', 'phases', 'counters', 'profiler')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.perf_counter()
+        self.wall_seconds: Optional[float] = None
+        self.phases: Dict[str, List[float]] = {}   # phase -> [seconds, calls]
+        self.counters: Dict[str, int] = {}
+        self.profiler = None
+
+
+class _NullPhase:
+    """Phase context used while instrumentation is off"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class _Phase:
+    """Adds the time spent inside the with-block to a named phase"""
+    __slots__ = ('owner', 'record', 'name', 'started')
+
+    def __init__(self, owner: "Instrumentation", record: OperationRecord, name: str):
+        self.owner = owner
+        self.record = record
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.owner._add_time(self.record, self.name, time.perf_counter() - self.started)
+        return False
+
+
+class _Resumed:
+    """Makes a finished operation current again for the with-block and extends its wall time"""
+    __slots__ = ('owner', 'record')
+
+    def __init__(self, owner: "Instrumentation", record: OperationRecord):
+        self.owner = owner
+        self.record = record
+
+    def __enter__(self):
+        self.owner.current = self.record
+        return self
+
+    def __exit__(self, *exc_info):
+        self.record.wall_seconds = time.perf_counter() - self.record.started
+        # An operation begun inside the block stays current
+        if self.owner.current is self.record:
+            self.owner.current = None
+        return False
+
+
+class _Profiled:
+    """Runs the with-block under the operation's cProfile profiler, in the calling thread"""
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self.active = False
+
+    def __enter__(self):
+        try:
+            self.profiler.enable()
+            self.active = True
+        except ValueError:
+            # Another profiler is already active in this thread
+            pass
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.active:
+            self.profiler.disable()
+        return False
+
+
+class Instrumentation:
+    """Collects phase timings for the current operation; a no-op unless enabled"""
+
+    def __init__(self, enabled: bool = False, profile: bool = False):
+        self.enabled = enabled
+        self.profile = profile
+        self.current: Optional[OperationRecord] = None
+        self.last: Optional[OperationRecord] = None
+        self._lock = threading.Lock()
+
+    def begin(self, name: str) -> Optional[OperationRecord]:
+        """Start recording a new operation, replacing any unfinished one"""
+        if not self.enabled:
+            self.current = None
+            return None
+        record = OperationRecord(name)
+        if self.profile:
+            import cProfile  # only loaded when profiling is requested
+            record.profiler = cProfile.Profile()
+        self.current = record
+        return record
+
+    def end(self):
+        """Finish the current operation and keep it as the last one"""
+        record = self.current
+        if record is None:
+            return
+        record.wall_seconds = time.perf_counter() - record.started
+        self.last = record
+        self.current = None
+
+    def resumed(self, record: Optional[OperationRecord]):
+        """Context manager adding the with-block's phases and time to an operation that already ended"""
+        if record is None:
+            return _NULL_PHASE
+        return _Resumed(self, record)
+
+    def phase(self, name: str):
+        """Context manager timing one phase of the current operation"""
+        record = self.current
+        if record is None:
+            return _NULL_PHASE
+        return _Phase(self, record, name)
+
+    def profiled(self):
+        """Context manager profiling the with-block when cProfile data is being collected"""
+        record = self.current
+        if record is None or record.profiler is None:
+            return _NULL_PHASE
+        return _Profiled(record.profiler)
+
+    def count(self, name: str, amount: int = 1):
+        """Add to a counter of the current operation"""
+        record = self.current
+        if record is None:
+            return
+        with self._lock:
+            record.counters[name] = record.counters.get(name, 0) + amount
+
+    def _add_time(self, record: OperationRecord, name: str, seconds: float):
+        """Accumulate a phase duration; phases may end on worker threads"""
+        with self._lock:
+            totals = record.phases.setdefault(name, [0.0, 0])
+            totals[0] += seconds
+            totals[1] += 1
+
+    def dump_profile(self, path: str) -> bool:
+        """Write the last operation's cProfile data as a pstats file"""
+        record = self.last
+        if record is None or record.profiler is None:
+            return False
+        record.profiler.dump_stats(path)
+        return True
+
+    def format_report(self) -> str:
+        """Plain-text report of the last finished operation"""
+        record = self.last
+        if record is None:
+            if not self.enabled:
+                return "Instrumentation is off.\nEnable it here or start the app with FSV_INSTRUMENT=1."
+            return "No operation recorded yet.\nLoad a folder, copy files or show statistics."
+
+        report = f"Operation: {record.name}\nWall time: {record.wall_seconds:.3f} s\n\nPhases:\n"
+        for name, (seconds, calls) in sorted(record.phases.items()):
+            report += f"  {name:<24} {seconds:9.3f} s  {calls:>6,} calls\n"
+        if record.counters:
+            report += "\nCounters:\n"
+            for name, value in sorted(record.counters.items()):
+                report += f"  {name:<24} {value:>12,}\n"
+        report += "\ncProfile data: " + ("available" if record.profiler is not None else "not collected") + "\n"
+        return report
+
+
+# Shared by the models, views and controller
+instrumentation = Instrumentation(INSTRUMENTATION_ENABLED, PROFILING_ENABLED)
@@ -3,13 +3,30 @@ ASCII tree display panel
 """
 import tkinter as tk
 from tkinter import ttk
+import tkinter.font as tkfont
+from array import array
+from itertools import chain
+from models.line_buffer import TaggedLineBuffer
+from models.scanner import ScanEntry
+from models.tree_table import ROOT_ROW, child_order, splice
 from utils.theme import ModernTheme
+from utils.constants import ASCII_INSERT_BATCH_LINES, ASCII_VIRTUAL_MIN_LINES
 
 class AsciiPanel:
+    # Text tag for each kind of line produced by FolderSnapshot.iter_ascii_rows
+    LINE_TAGS = {"folder": "folder_total", "file": "file_lines"}
+    INSERT_MARK = "ascii_insert"
+    
     def __init__(self, parent, controller):
         self.parent = parent
         self.controller = controller
         self.theme = ModernTheme()
+        self.buffer = None      # TaggedLineBuffer with every line of the current tree
+        self.table = None       # TreeTable the buffer was rendered from
+        self.line_rows = array('i')  # table row of each tree line (the summary lines follow them)
+        self.has_errors = False  # error text runs into the next line, so such trees are only diffed
+        self.virtual = False    # True when only the visible window of the buffer is in the widget
+        self.top_line = 0       # first buffer line shown in virtual mode
         self.create_widgets()
     
     def create_widgets(self):
@@ -48,10 +65,10 @@ class AsciiPanel:
         self.text_scroll_v = ttk.Scrollbar(
             text_container,
             orient=tk.VERTICAL,
-            command=self.ascii_tree_text.yview
+            command=self.on_yview
         )
         self.text_scroll_v.pack(side=tk.RIGHT, fill=tk.Y)
-        self.ascii_tree_text.config(yscrollcommand=self.text_scroll_v.set)
+        self.ascii_tree_text.config(yscrollcommand=self._on_text_yscroll)
         
         # Horizontal scrollbar
         self.text_scroll_h = ttk.Scrollbar(
@@ -64,6 +81,13 @@ class AsciiPanel:
         
         # Configure text tags for syntax highlighting
         self.configure_text_tags()
+        self.line_height = tkfont.Font(font=(self.theme.FONT_MONO, 10)).metrics("linespace")
+        
+        # In virtual mode scrolling moves the window over the buffer instead
+        self.ascii_tree_text.bind("<Configure>", self._on_text_configure)
+        self.ascii_tree_text.bind("<MouseWheel>", self._on_mousewheel)
+        self.ascii_tree_text.bind("<Prior>", lambda e: self._on_page_key(-1))
+        self.ascii_tree_text.bind("<Next>", lambda e: self._on_page_key(1))
     
     def configure_text_tags(self):
         """Configure text tags for different content types"""
@@ -88,51 +112,319 @@ class AsciiPanel:
             font=(self.theme.FONT_MONO, 10)
         )
     
-    def display_ascii_tree(self, folder_path, ignore_folders):
+    def display_ascii_tree(self, snapshot):
         """Display ASCII tree structure"""
         self.ascii_tree_text.delete(1.0, tk.END)
+        self.buffer = None
+        self.table = None
+        self.virtual = False
+        self.top_line = 0
         
-        if not folder_path:
+        if snapshot is None:
             self.ascii_tree_text.insert(tk.END, "No folder selected")
             return
         
-        # Generate tree
-        ascii_tree, total_lines = self.controller.file_manager.generate_ascii_tree(
-            folder_path, ignore_folders
-        )
+        self.buffer = self.render(snapshot)
+        if len(self.buffer) >= ASCII_VIRTUAL_MIN_LINES:
+            self.virtual = True
+            self.show_window(0)
+        else:
+            self.insert_lines(tk.END, self.buffer.iter_lines())
+    
+    def update_ascii_tree(self, snapshot):
+        """Replace only the lines that changed since the tree was last displayed"""
+        if self.buffer is None:
+            self.display_ascii_tree(snapshot)
+            return
         
-        # Insert tree content
-        self.ascii_tree_text.insert(tk.END, ascii_tree)
+        old_lines = self.buffer
+        new_lines = self.render(snapshot)
+        self.buffer = new_lines
+        if self.virtual or len(new_lines) >= ASCII_VIRTUAL_MIN_LINES:
+            self.virtual = True
+            self.show_window(self.top_line)
+            return
+        
+        # Common prefix and suffix stay in the widget untouched
+        prefix = 0
+        limit = min(len(old_lines), len(new_lines))
+        while prefix < limit and old_lines.raw_line(prefix) == new_lines.raw_line(prefix):
+            prefix += 1
+        suffix = 0
+        while (suffix < limit - prefix and
+               old_lines.raw_line(len(old_lines) - 1 - suffix) == new_lines.raw_line(len(new_lines) - 1 - suffix)):
+            suffix += 1
         
-        # Add summary
-        summary = f"\n🎯 TOTAL LINES IN FOLDER: {total_lines:,}\n"
-        summary += f"📁 Folder: {folder_path}"
-        self.ascii_tree_text.insert(tk.END, summary)
+        old_end = len(old_lines) - suffix
+        new_end = len(new_lines) - suffix
+        if prefix == old_end and prefix == new_end:
+            return
         
-        # Apply formatting
-        self.apply_text_formatting()
+        self.ascii_tree_text.delete(f"{prefix + 1}.0", f"{old_end + 1}.0")
+        self.insert_lines(f"{prefix + 1}.0", new_lines.iter_lines(prefix, new_end))
+    
+    def render(self, snapshot):
+        """Buffer with the whole tree and summary, remembering the table row of every tree line"""
+        rows = array('i')
+        buffer = TaggedLineBuffer.from_lines(chain(self.iter_tagged_lines(snapshot, rows), self.summary_lines(snapshot)))
+        self.table = snapshot.table
+        self.line_rows = rows
+        self.has_errors = bool(snapshot.table.errors)
+        return buffer
+    
+    def iter_tagged_lines(self, snapshot, rows, entry=None, indent=""):
+        """Tree lines below entry as (line, text tag) pairs; the table row of each is appended to rows"""
+        pending = ""
+        for text, kind, row in snapshot.iter_ascii_rows(entry, indent):
+            if not text.endswith("\n"):
+                # Error messages carry no newline and run into the next line
+                pending += text
+                continue
+            rows.append(row)
+            yield pending + text[:-1], self.LINE_TAGS.get(kind, "")
+            pending = ""
+        if pending:
+            rows.append(-1)
+            yield pending, ""
     
-    def apply_text_formatting(self):
-        """Apply syntax highlighting to the text"""
-        content = self.ascii_tree_text.get(1.0, tk.END)
-        lines = content.split('\n')
+    def summary_lines(self, snapshot):
+        """Lines shown after the tree"""
+        return [
+            ("", ""),
+            (f"🎯 TOTAL LINES IN FOLDER: {snapshot.total_lines:,}", "grand_total"),
+            (f"🧮 ESTIMATED TOKENS: ~{snapshot.total_tokens:,} ({snapshot.token_estimator})", "grand_total"),
+            (f"📁 Folder: {snapshot.folder_path}", ""),
+            ("", ""),
+        ]
+    
+    def update_folders(self, snapshot, result):
+        """Re-render only the lines of relisted folders, the totals of their ancestors and the summary"""
+        table = snapshot.table
+        if self.buffer is None or table is not self.table or self.has_errors or table.errors:
+            self.update_ascii_tree(snapshot)
+            return
         
-        self.ascii_tree_text.delete(1.0, tk.END)
+        # Inserts at the same position go in tree order, as their first rows do
+        edits = [edit for edit in self._folder_edits(snapshot, result) if edit[0] != edit[1] or edit[2]]
+        edits.sort(key=lambda edit: (edit[0], edit[1], table.sort_key(edit[3][0]) if edit[0] == edit[1] else ()))
+        if any(edits[i][1] > edits[i + 1][0] for i in range(len(edits) - 1)):
+            self.update_ascii_tree(snapshot)  # overlapping patches: diff the whole tree instead
+            return
+        
+        old_lines = self.buffer
+        tree_end = len(self.line_rows)
+        line_edits = [(start, stop, lines) for start, stop, lines, _ in edits]
+        line_edits.append((tree_end, len(old_lines), self.summary_lines(snapshot)))
+        self.buffer = old_lines.splice(line_edits)
+        self.line_rows = splice(self.line_rows, [(start, stop, rows) for start, stop, _, rows in edits])
+        
+        if self.virtual or len(self.buffer) >= ASCII_VIRTUAL_MIN_LINES:
+            self.virtual = True
+            self.show_window(self.top_line)
+            return
+        
+        # Bottom up, so the line numbers of the remaining edits stay valid
+        for start, stop, lines in reversed(line_edits):
+            if list(old_lines.iter_lines(start, stop)) == list(lines):
+                continue
+            self.ascii_tree_text.delete(f"{start + 1}.0", f"{stop + 1}.0")
+            self.insert_lines(f"{start + 1}.0", lines)
+    
+    def _folder_edits(self, snapshot, result):
+        """(start, stop, lines, rows) replacements of the tree lines for an incremental rescan
+
+        The lines of a relisted folder's children are matched against its new
+        children; the subtrees of kept subfolders are left alone unless their
+        indent changes. Totals of the remaining ancestors are rewritten in place.
+        """
+        table = snapshot.table
+        rows = self.line_rows
+        tree_end = len(rows)
+        edits = []
+        rewritten = set()  # folders whose header line already shows the new totals
         
-        for line in lines:
-            if "total lines)" in line:
-                self.ascii_tree_text.insert(tk.END, line + '\n', "folder_total")
-            elif " lines)" in line and "total" not in line:
-                self.ascii_tree_text.insert(tk.END, line + '\n', "file_lines")
-            elif "TOTAL LINES IN FOLDER:" in line:
-                self.ascii_tree_text.insert(tk.END, line + '\n', "grand_total")
-            elif line.startswith(('├──', '└──', '│')):
-                self.ascii_tree_text.insert(tk.END, line + '\n', "tree_structure")
+        for folder in result.relisted:
+            first, last = table.find_span(rows, folder.row, stop=tree_end)
+            if folder.row == ROOT_ROW:
+                indent = ""
+                position = 0
             else:
-                self.ascii_tree_text.insert(tk.END, line + '\n')
+                if first == last:
+                    return self._redraw_all(snapshot, tree_end)
+                header_indent, header_is_last = self._header_shape(table, folder.row)
+                indent = header_indent + ("    " if header_is_last else "│   ")
+                position = first + 1
+            
+            # Old lines come in blocks, one per former child: its line and its subtree
+            old_blocks = []
+            while position < last:
+                child = rows[position]
+                stop = table.find_span(rows, child, False, position, last)[1] if table.is_dir(child) else position + 1
+                old_blocks.append((child, position, stop))
+                position = stop
+            
+            children = list(table.children(folder.row))
+            i = j = 0
+            while i < len(old_blocks) or j < len(children):
+                old = old_blocks[i] if i < len(old_blocks) else None
+                child = children[j] if j < len(children) else None
+                old_key = child_order(table.name(old[0]), table.flags[old[0]]) if old else None
+                new_key = child_order(table.name(child), table.flags[child]) if child is not None else None
+                
+                if child is None or (old is not None and old_key < new_key):
+                    edits.append((old[1], old[2], (), ()))  # removed
+                    i += 1
+                    continue
+                
+                is_last = j == len(children) - 1
+                j += 1
+                if old is None or new_key < old_key or table.is_dir(old[0]) != table.is_dir(child):
+                    # Added (or replaced by an entry of another kind)
+                    start, stop = (old[1], old[1]) if old is not None else (last, last)
+                    if old is not None and new_key == old_key:
+                        stop = old[2]
+                        i += 1
+                    lines, line_rows = self._render_child(snapshot, child, indent, is_last)
+                    edits.append((start, stop, lines, line_rows))
+                    continue
+                
+                i += 1
+                tag = self.LINE_TAGS["folder" if table.is_dir(child) else "file"]
+                line = (snapshot.ascii_line(child, indent, is_last), tag)
+                if table.is_dir(child):
+                    rewritten.add(child)
+                    was_last = self._line(old[1])[len(indent)] == "└"
+                    if was_last != is_last:
+                        # The subtree's indent below this folder changes from "│   " to "    " or back
+                        column = len(indent)
+                        block = "    " if is_last else "│   "
+                        subtree = [(text[:column] + block + text[column + 4:], text_tag)
+                                   for text, text_tag in self.buffer.iter_lines(old[1] + 1, old[2])]
+                        edits.append((old[1], old[2], [line] + subtree, [child] + list(rows[old[1] + 1:old[2]])))
+                        continue
+                edits.append((old[1], old[1] + 1, [line], [child]))
+        
+        for folder in result.totals:
+            if folder.row == ROOT_ROW or folder.row in rewritten:
+                continue
+            first, last = table.find_span(rows, folder.row, stop=tree_end)
+            if first == last:
+                return self._redraw_all(snapshot, tree_end)
+            header_indent, header_is_last = self._header_shape(table, folder.row)
+            line = (snapshot.ascii_line(folder.row, header_indent, header_is_last), self.LINE_TAGS["folder"])
+            edits.append((first, first + 1, [line], [folder.row]))
+        return edits
+    
+    def _redraw_all(self, snapshot, tree_end):
+        """Single edit that re-renders every tree line, for states the patcher does not expect"""
+        rows = array('i')
+        lines = list(self.iter_tagged_lines(snapshot, rows))
+        return [(0, tree_end, lines, rows)]
+    
+    def _render_child(self, snapshot, row, indent, is_last):
+        """Lines and rows of one new child of a folder, with its whole subtree"""
+        kind = "folder" if snapshot.table.is_dir(row) else "file"
+        lines = [(snapshot.ascii_line(row, indent, is_last), self.LINE_TAGS[kind])]
+        rows = array('i', [row])
+        if kind == "folder":
+            lines.extend(self.iter_tagged_lines(snapshot, rows, ScanEntry(snapshot.table, row),
+                                                indent + ("    " if is_last else "│   ")))
+        return lines, rows
+    
+    def _line(self, index):
+        """Text of one buffer line"""
+        return next(self.buffer.iter_lines(index, index + 1))[0]
+    
+    def _header_shape(self, table, row):
+        """Indent and last-child connector of the line of row, from its place in the table"""
+        blocks = []
+        while row != ROOT_ROW:
+            parent = table.parent[row]
+            blocks.append(row == table.child_start[parent] + table.child_count[parent] - 1)
+            row = parent
+        is_last = blocks[0]
+        return "".join("    " if last else "│   " for last in reversed(blocks[1:])), is_last
+    
+    def visible_rows(self):
+        """Number of text lines that fit in the widget"""
+        return max(self.ascii_tree_text.winfo_height() // max(self.line_height, 1), 1) + 1
+    
+    def show_window(self, top_line):
+        """Virtual mode: put only the lines around top_line into the widget"""
+        total = len(self.buffer)
+        rows = self.visible_rows()
+        top_line = max(0, min(top_line, total - rows + 1))
+        self.top_line = top_line
+        
+        self.ascii_tree_text.delete(1.0, tk.END)
+        self.insert_lines("1.0", self.buffer.iter_lines(top_line, top_line + rows))
+        self.text_scroll_v.set(top_line / total, min((top_line + rows) / total, 1.0))
+    
+    def on_yview(self, *args):
+        """Scrollbar command: scroll the widget, or the window over the buffer in virtual mode"""
+        if not self.virtual:
+            self.ascii_tree_text.yview(*args)
+            return
+        
+        if args[0] == "moveto":
+            self.show_window(int(float(args[1]) * len(self.buffer)))
+        elif args[0] == "scroll":
+            step = self.visible_rows() - 1 if args[2] == "pages" else 1
+            self.show_window(self.top_line + int(args[1]) * step)
+    
+    def _on_text_yscroll(self, first, last):
+        """Mirror the widget's own scroll position unless the window is virtual"""
+        if not self.virtual:
+            self.text_scroll_v.set(first, last)
+    
+    def _on_text_configure(self, event):
+        """Refill the window when the widget is resized"""
+        if self.virtual:
+            self.show_window(self.top_line)
+    
+    def _on_mousewheel(self, event):
+        """Handle mouse wheel scrolling in virtual mode"""
+        if self.virtual:
+            self.on_yview("scroll", int(-1*(event.delta/120)) * 3, "units")
+            return "break"
+    
+    def _on_page_key(self, direction):
+        """Handle Page Up/Page Down in virtual mode"""
+        if self.virtual:
+            self.on_yview("scroll", direction, "pages")
+            return "break"
+    
+    def insert_lines(self, index, lines):
+        """Insert tagged lines in a few large Tcl calls, one text run per stretch of equal tags"""
+        text = self.ascii_tree_text
+        text.mark_set(self.INSERT_MARK, index)
+        
+        args = []
+        run = []
+        run_tag = None
+        for count, (line, tag) in enumerate(lines, 1):
+            if tag != run_tag and run:
+                args += ("\n".join(run) + "\n", run_tag)
+                run = []
+            run_tag = tag
+            run.append(line)
+            
+            if count % ASCII_INSERT_BATCH_LINES == 0:
+                args += ("\n".join(run) + "\n", run_tag)
+                run = []
+                text.insert(self.INSERT_MARK, *args)
+                args = []
+        
+        if run:
+            args += ("\n".join(run) + "\n", run_tag)
+        if args:
+            text.insert(self.INSERT_MARK, *args)
+        text.mark_unset(self.INSERT_MARK)
     
     def get_content(self):
-        """Get the current ASCII tree content"""
+        """Get the current ASCII tree content, straight from the buffer when there is one"""
+        if self.buffer is not None:
+            return self.buffer.get_text()
         return self.ascii_tree_text.get(1.0, tk.END)
     
     def get_frame(self):
@@ -1,17 +1,24 @@
 """
-Individual file copy buttons panel
+Individual file copy buttons panel (virtualized: only visible rows have widgets)
 """
 import tkinter as tk
 from tkinter import ttk
 import os
+from array import array
+from models.tree_table import splice
 from utils.theme import ModernTheme
+from utils.constants import BUTTON_ROW_HEIGHT, BUTTON_ROW_GAP, BUTTON_ROW_PADX
 
 class ButtonsPanel:
     def __init__(self, parent, controller):
         self.parent = parent
         self.controller = controller
         self.theme = ModernTheme()
-        self.buttons = []
+        self.table = None       # TreeTable the rows point into
+        self.file_rows = array('i')  # table row of each button row, in display order
+        self.buttons = []       # recycled row buttons
+        self.row_windows = []   # canvas window item per button
+        self.slot_rows = []     # row index currently shown by each button
         self.create_widgets()
     
     def create_widgets(self):
@@ -36,7 +43,8 @@ class ButtonsPanel:
         self.buttons_canvas = tk.Canvas(
             self.buttons_frame,
             bg=self.theme.BACKGROUND_SECONDARY,
-            highlightthickness=0
+            highlightthickness=0,
+            yscrollincrement=BUTTON_ROW_HEIGHT
         )
         self.buttons_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         
@@ -47,24 +55,9 @@ class ButtonsPanel:
         )
         self.buttons_scroll.pack(side=tk.RIGHT, fill=tk.Y)
         
-        # Inner frame for buttons
-        self.buttons_inner_frame = tk.Frame(
-            self.buttons_canvas,
-            bg=self.theme.BACKGROUND_SECONDARY
-        )
-        
-        self.buttons_canvas.create_window(
-            (0, 0),
-            window=self.buttons_inner_frame,
-            anchor=tk.NW
-        )
-        
-        # Configure scrolling
-        self.buttons_inner_frame.bind(
-            "<Configure>",
-            lambda e: self.buttons_canvas.configure(scrollregion=self.buttons_canvas.bbox("all"))
-        )
-        self.buttons_canvas.configure(yscrollcommand=self.buttons_scroll.set)
+        # Configure scrolling; every view change re-renders the visible rows
+        self.buttons_canvas.configure(yscrollcommand=self._on_canvas_scroll)
+        self.buttons_canvas.bind("<Configure>", self._on_canvas_configure)
         
         # Mouse wheel binding
         self.buttons_canvas.bind("<MouseWheel>", self._on_mousewheel)
@@ -73,48 +66,146 @@ class ButtonsPanel:
         """Handle mouse wheel scrolling"""
         self.buttons_canvas.yview_scroll(int(-1*(event.delta/120)), "units")
     
+    def _on_canvas_scroll(self, first, last):
+        """Keep the scrollbar in sync and refill the visible rows"""
+        self.buttons_scroll.set(first, last)
+        self._render_visible_rows()
+    
+    def _on_canvas_configure(self, event):
+        """Resize row widgets to the canvas width and fill any new rows"""
+        for window in self.row_windows:
+            self.buttons_canvas.itemconfigure(window, width=max(event.width - 2 * BUTTON_ROW_PADX, 1))
+        self._render_visible_rows()
+    
     def clear_buttons(self):
         """Clear all file copy buttons"""
-        for button in self.buttons:
-            button.destroy()
-        self.buttons.clear()
+        self.table = None
+        self.file_rows = array('i')
+        self._invalidate_rows()
+        self._update_scroll_region()
+        self._render_visible_rows()
     
-    def populate_buttons(self, folder_path, ignore_folders):
-        """Create copy buttons for all files in folder"""
-        self.clear_buttons()
-        
-        if not os.path.exists(folder_path):
+    def populate_buttons(self, snapshot):
+        """Show a copy button for every non-empty file in the snapshot"""
+        self._load_rows(snapshot)
+        self.buttons_canvas.yview_moveto(0)
+        self._invalidate_rows()
+        self._update_scroll_region()
+        self._render_visible_rows()
+    
+    def refresh_buttons(self, snapshot):
+        """Re-read the rows after an incremental update, keeping the scroll position"""
+        self._load_rows(snapshot)
+        self._invalidate_rows()
+        self._update_scroll_region()
+        self._render_visible_rows()
+    
+    def _load_rows(self, snapshot):
+        """Take every non-empty file of the snapshot, in tree order"""
+        self.table = None
+        self.file_rows = array('i')
+        if snapshot is not None:
+            self.table = snapshot.table
+            self.file_rows = array('i', snapshot.text_file_rows())
+    
+    def update_folders(self, snapshot, result):
+        """Patch only the rows of relisted folders after an incremental update
+
+        Each folder's own files and its new or removed subfolders are spliced in;
+        the rows of untouched subfolders are kept as they are.
+        """
+        table = snapshot.table
+        if table is not self.table:
+            self.refresh_buttons(snapshot)
             return
         
-        file_count = 0
-        for root, dirs, files in os.walk(folder_path):
-            # Remove ignored directories
-            dirs[:] = [d for d in dirs if d not in ignore_folders]
+        rows = self.file_rows
+        parent, lines, flags = table.parent, table.lines, table.flags
+        edits = []
+        for folder in result.relisted:
+            # A folder's own files come first in its span; the old rows still point at it
+            first, last = table.find_span(rows, folder.row, files_first=True)
+            own_end = first
+            while own_end < last and parent[rows[own_end]] == folder.row:
+                own_end += 1
+            own_files = [child for child in table.children(folder.row)
+                         if not table.is_dir(child) and lines[child] > 0]
+            edits.append((first, own_end, own_files))
             
-            for file in files:
-                file_path = os.path.join(root, file)
-                lines = self.controller.file_manager.count_lines_of_code(file_path)
-                
-                if lines > 0:
-                    self.create_file_button(file_path, file, lines)
-                    file_count += 1
+            for removed in result.removed_folders:
+                if parent[removed] == folder.row:
+                    start, stop = table.find_span(rows, removed, True, own_end, last)
+                    edits.append((start, stop, ()))
+            for added in sorted((row for row in result.new_folders if parent[row] == folder.row),
+                                key=lambda row: table.sort_key(row, True)):
+                start, _ = table.find_span(rows, added, True, own_end, last)
+                edits.append((start, start, snapshot.text_file_rows(added)))
         
-        # Update scroll region
-        self.buttons_inner_frame.update_idletasks()
-        self.buttons_canvas.configure(scrollregion=self.buttons_canvas.bbox("all"))
-    
-    def create_file_button(self, file_path, file_name, lines):
-        """Create a button for copying individual file"""
-        # Determine file type for icon
-        ext = os.path.splitext(file_name)[1].lower()
-        icon = self.get_file_icon(ext)
+        # Inserts at the same position go in tree order, as their first rows do
+        edits = [edit for edit in edits if edit[0] != edit[1] or edit[2]]
+        edits.sort(key=lambda edit: (edit[0], edit[1], table.sort_key(edit[2][0], True) if edit[0] == edit[1] else ()))
+        if any(edits[i][1] > edits[i + 1][0] for i in range(len(edits) - 1)):
+            self.refresh_buttons(snapshot)  # overlapping patches: start over
+            return
+        self.file_rows = splice(rows, edits)
         
-        button_text = f"{icon} {file_name} ({lines} lines)"
+        self._invalidate_rows()
+        self._update_scroll_region()
+        self._render_visible_rows()
+    
+    def _invalidate_rows(self):
+        """Force every recycled button to be refilled on the next render"""
+        self.slot_rows = [-1] * len(self.buttons)
+    
+    def _update_scroll_region(self):
+        """Size the scroll region for every row, not just the rendered ones"""
+        height = len(self.file_rows) * BUTTON_ROW_HEIGHT
+        self.buttons_canvas.configure(scrollregion=(0, 0, self.buttons_canvas.winfo_width(), height))
+    
+    def _render_visible_rows(self):
+        """Point the recycled buttons at the rows inside the visible window"""
+        view_height = max(self.buttons_canvas.winfo_height(), 1)
+        first_row = max(int(self.buttons_canvas.canvasy(0)) // BUTTON_ROW_HEIGHT, 0)
+        self._ensure_row_widgets(view_height // BUTTON_ROW_HEIGHT + 2)
         
+        for slot, (button, window) in enumerate(zip(self.buttons, self.row_windows)):
+            row = first_row + slot
+            if row >= len(self.file_rows):
+                if self.slot_rows[slot] is not None:
+                    # Park unused rows outside the scroll region
+                    self.buttons_canvas.coords(window, BUTTON_ROW_PADX, -BUTTON_ROW_HEIGHT * 2)
+                    self.slot_rows[slot] = None
+                continue
+            
+            if self.slot_rows[slot] != row:
+                table_row = self.file_rows[row]
+                button.config(text=self.get_button_text(
+                    self.table.name(table_row), self.table.lines[table_row], self.table.tokens[table_row]))
+                self.buttons_canvas.coords(window, BUTTON_ROW_PADX, row * BUTTON_ROW_HEIGHT)
+                self.slot_rows[slot] = row
+    
+    def _ensure_row_widgets(self, count):
+        """Create row buttons until the pool has count of them"""
+        width = max(self.buttons_canvas.winfo_width() - 2 * BUTTON_ROW_PADX, 1)
+        while len(self.buttons) < count:
+            slot = len(self.buttons)
+            copy_button = self.create_file_button(slot)
+            window = self.buttons_canvas.create_window(
+                BUTTON_ROW_PADX, -BUTTON_ROW_HEIGHT * 2,
+                window=copy_button,
+                anchor=tk.NW,
+                width=width,
+                height=BUTTON_ROW_HEIGHT - BUTTON_ROW_GAP
+            )
+            self.buttons.append(copy_button)
+            self.row_windows.append(window)
+            self.slot_rows.append(None)
+    
+    def create_file_button(self, slot):
+        """Create a reusable button for copying the file shown in slot"""
         copy_button = tk.Button(
-            self.buttons_inner_frame,
-            text=button_text,
-            command=lambda: self.controller.copy_single_file(file_path),
+            self.buttons_canvas,
+            command=lambda: self._on_row_click(slot),
             bg=self.theme.ACCENT_BLUE,
             fg=self.theme.TEXT_PRIMARY,
             activebackground=self.theme.ACCENT_BLUE_HOVER,
@@ -126,13 +217,24 @@ class ButtonsPanel:
             padx=15,
             pady=8
         )
-        copy_button.pack(side=tk.TOP, fill=tk.X, padx=5, pady=3)
         
         # Add hover effect
         copy_button.bind("<Enter>", lambda e: copy_button.config(bg=self.theme.ACCENT_BLUE_HOVER))
         copy_button.bind("<Leave>", lambda e: copy_button.config(bg=self.theme.ACCENT_BLUE))
+        copy_button.bind("<MouseWheel>", self._on_mousewheel)
         
-        self.buttons.append(copy_button)
+        return copy_button
+    
+    def _on_row_click(self, slot):
+        """Copy the file currently shown by the clicked button"""
+        row = self.slot_rows[slot]
+        if row is not None and 0 <= row < len(self.file_rows):
+            self.controller.copy_single_file(self.table.path(self.file_rows[row]))
+    
+    def get_button_text(self, file_name, lines, tokens):
+        """Label for a file's copy button"""
+        ext = os.path.splitext(file_name)[1].lower()
+        return f"{self.get_file_icon(ext)} {file_name} ({lines} lines, ~{tokens:,} tokens)"
     
     def get_file_icon(self, extension):
         """Get appropriate icon for file type"""
@@ -2,9 +2,9 @@
 Header panel with folder selection and action buttons
 """
 import tkinter as tk
-from tkinter import filedialog
 from utils.theme import ModernTheme
-from utils.constants import DEFAULT_IGNORE_FOLDERS
+from utils.constants import DEFAULT_IGNORE_FOLDERS, USE_GITIGNORE, PACK_DEFAULT_UNIT
+from models.packing import PACK_UNITS
 
 class HeaderPanel:
     def __init__(self, parent, controller):
@@ -16,6 +16,10 @@ class HeaderPanel:
         self.folder_var = tk.StringVar()
         self.ignore_var = tk.StringVar()
         self.ignore_var.set(DEFAULT_IGNORE_FOLDERS)
+        self.watch_var = tk.BooleanVar(value=False)
+        self.gitignore_var = tk.BooleanVar(value=USE_GITIGNORE)
+        self.budget_var = tk.StringVar()
+        self.budget_unit_var = tk.StringVar(value=PACK_DEFAULT_UNIT)
         
         self.create_widgets()
     
@@ -75,7 +79,22 @@ class HeaderPanel:
             command=self.refresh_display,
             **self.theme.get_button_style(self.theme.ACCENT_ORANGE)
         )
-        self.refresh_button.pack(side=tk.LEFT)
+        self.refresh_button.pack(side=tk.LEFT, padx=(0, 10))
+        
+        # Watch toggle (refresh changed folders automatically)
+        self.watch_check = tk.Checkbutton(
+            folder_row,
+            text="👁 Watch",
+            variable=self.watch_var,
+            command=self.toggle_watch,
+            bg=self.theme.BACKGROUND_SECONDARY,
+            fg=self.theme.TEXT_PRIMARY,
+            selectcolor=self.theme.BACKGROUND_TERTIARY,
+            activebackground=self.theme.BACKGROUND_SECONDARY,
+            activeforeground=self.theme.TEXT_PRIMARY,
+            font=(self.theme.FONT_FAMILY, 10)
+        )
+        self.watch_check.pack(side=tk.LEFT)
     
     def create_ignore_section(self):
         """Create ignore folders section"""
@@ -85,7 +104,7 @@ class HeaderPanel:
         # Ignore label
         ignore_label = tk.Label(
             ignore_row,
-            text="🚫 Ignore Folders:",
+            text="🚫 Ignore (names/globs):",
             **self.theme.get_label_style(10, "bold")
         )
         ignore_label.pack(side=tk.LEFT, padx=(0, 15))
@@ -96,7 +115,21 @@ class HeaderPanel:
             textvariable=self.ignore_var,
             **self.theme.get_entry_style()
         )
-        self.ignore_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.ignore_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 15))
+        
+        # Honor .gitignore/.ignore files found while scanning
+        self.gitignore_check = tk.Checkbutton(
+            ignore_row,
+            text="Use .gitignore",
+            variable=self.gitignore_var,
+            bg=self.theme.BACKGROUND_SECONDARY,
+            fg=self.theme.TEXT_PRIMARY,
+            selectcolor=self.theme.BACKGROUND_TERTIARY,
+            activebackground=self.theme.BACKGROUND_SECONDARY,
+            activeforeground=self.theme.TEXT_PRIMARY,
+            font=(self.theme.FONT_FAMILY, 10)
+        )
+        self.gitignore_check.pack(side=tk.LEFT)
     
     def create_actions_section(self):
         """Create action buttons section"""
@@ -110,7 +143,35 @@ class HeaderPanel:
             command=self.copy_all_files,
             **self.theme.get_button_style(self.theme.ACCENT_GREEN)
         )
-        self.copy_all_button.pack(side=tk.LEFT, padx=(0, 10))
+        self.copy_all_button.pack(side=tk.LEFT, padx=(0, 5))
+        
+        # Optional budget for Copy All Files (empty copies everything)
+        budget_label = tk.Label(
+            actions_row,
+            text="Budget:",
+            **self.theme.get_label_style(10)
+        )
+        budget_label.pack(side=tk.LEFT, padx=(0, 5))
+        
+        self.budget_entry = tk.Entry(
+            actions_row,
+            textvariable=self.budget_var,
+            width=10,
+            **self.theme.get_entry_style()
+        )
+        self.budget_entry.pack(side=tk.LEFT, padx=(0, 5))
+        
+        self.budget_unit_menu = tk.OptionMenu(actions_row, self.budget_unit_var, *PACK_UNITS)
+        self.budget_unit_menu.config(
+            bg=self.theme.BACKGROUND_TERTIARY,
+            fg=self.theme.TEXT_PRIMARY,
+            activebackground=self.theme.BACKGROUND_TERTIARY,
+            activeforeground=self.theme.TEXT_PRIMARY,
+            highlightthickness=0,
+            relief=tk.FLAT,
+            font=(self.theme.FONT_FAMILY, 10)
+        )
+        self.budget_unit_menu.pack(side=tk.LEFT, padx=(0, 10))
         
         # Copy ASCII tree button
         self.copy_tree_button = tk.Button(
@@ -128,10 +189,30 @@ class HeaderPanel:
             command=self.show_statistics,
             **self.theme.get_button_style(self.theme.BACKGROUND_TERTIARY)
         )
-        self.stats_button.pack(side=tk.LEFT)
+        self.stats_button.pack(side=tk.LEFT, padx=(0, 10))
+        
+        # Diagnostics button (timings of the last operation)
+        self.diagnostics_button = tk.Button(
+            actions_row,
+            text="🩺 Diagnostics",
+            command=self.show_diagnostics,
+            **self.theme.get_button_style(self.theme.BACKGROUND_TERTIARY)
+        )
+        self.diagnostics_button.pack(side=tk.LEFT)
+        
+        # Cancel button (enabled while background work is running)
+        self.cancel_button = tk.Button(
+            actions_row,
+            text="⏹ Cancel",
+            command=self.cancel_task,
+            state=tk.DISABLED,
+            **self.theme.get_button_style(self.theme.ACCENT_RED)
+        )
+        self.cancel_button.pack(side=tk.RIGHT)
     
     def browse_folder(self):
         """Handle folder browsing"""
+        from tkinter import filedialog  # loaded the first time a dialog is opened
         folder_path = filedialog.askdirectory()
         if folder_path:
             self.folder_var.set(folder_path)
@@ -141,6 +222,10 @@ class HeaderPanel:
         """Handle refresh button click"""
         self.controller.refresh_display()
     
+    def toggle_watch(self):
+        """Handle watch checkbox toggle"""
+        self.controller.set_watch_enabled(self.watch_var.get())
+    
     def copy_all_files(self):
         """Handle copy all files button click"""
         self.controller.copy_all_files()
@@ -153,10 +238,36 @@ class HeaderPanel:
         """Handle show statistics button click"""
         self.controller.show_statistics()
     
+    def show_diagnostics(self):
+        """Handle diagnostics button click"""
+        self.controller.show_diagnostics()
+    
+    def cancel_task(self):
+        """Handle cancel button click"""
+        self.controller.cancel_task()
+    
+    def set_cancel_enabled(self, enabled):
+        """Enable or disable the cancel button"""
+        self.cancel_button.config(state=tk.NORMAL if enabled else tk.DISABLED)
+    
     def get_folder_path(self):
         """Get current folder path"""
         return self.folder_var.get()
     
     def get_ignore_folders(self):
-        """Get list of ignored folders"""
-        return [f.strip() for f in self.ignore_var.get().split(",") if f.strip()]
\ No newline at end of file
+        """Get list of ignore names and globs"""
+        return [f.strip() for f in self.ignore_var.get().split(",") if f.strip()]
+    
+    def get_use_gitignore(self):
+        """Whether .gitignore/.ignore files should be honored"""
+        return self.gitignore_var.get()
+    
+    def get_budget(self):
+        """Budget for Copy All Files as (limit, unit), or None when empty; raises ValueError if invalid"""
+        text = self.budget_var.get().strip().replace(",", "").replace("_", "")
+        if not text:
+            return None
+        limit = int(text)
+        if limit <= 0:
+            raise ValueError("budget must be positive")
+        return limit, self.budget_unit_var.get()
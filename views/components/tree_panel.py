@@ -11,6 +11,9 @@ class TreePanel:
         self.parent = parent
         self.controller = controller
         self.theme = ModernTheme()
+        self.unpopulated_nodes = {}  # folder node id -> ScanEntry whose children are not inserted yet
+        self.folder_nodes = {}       # folder path -> node id, for incremental updates
+        self.root_path = None        # rows only keep their name; paths are rebuilt from the node chain
         self.create_widgets()
     
     def create_widgets(self):
@@ -50,62 +53,132 @@ class TreePanel:
         
         # Bind events
         self.file_tree.bind('<Double-1>', self.on_double_click)
+        self.file_tree.bind('<<TreeviewOpen>>', self.on_open)
     
     def clear_tree(self):
         """Clear the tree view"""
+        self.unpopulated_nodes.clear()
+        self.folder_nodes.clear()
         self.file_tree.delete(*self.file_tree.get_children())
     
-    def populate_tree(self, folder_path, ignore_folders):
+    def populate_tree(self, snapshot):
         """Populate tree with folder structure"""
         self.clear_tree()
         
-        if not os.path.exists(folder_path):
+        if snapshot is None:
             self.file_tree.insert("", "end", text="Invalid folder path", tags=("error",))
             return
         
         root_node = self.file_tree.insert(
             "", "end", 
-            text=f"📁 {os.path.basename(folder_path)}", 
+            text=f"📁 {os.path.basename(snapshot.folder_path)}", 
             open=True,
             tags=("folder",)
         )
+        self.root_path = snapshot.folder_path
+        self.folder_nodes[snapshot.root.path] = root_node
         
-        self._populate_node(folder_path, root_node, ignore_folders)
+        self._populate_node(snapshot.root, root_node)
     
-    def _populate_node(self, folder_path, parent_node, ignore_folders):
-        """Recursively populate tree nodes"""
-        try:
-            items = os.listdir(folder_path)
-        except PermissionError:
-            self.file_tree.insert(parent_node, "end", text="Permission denied", tags=("error",))
+    def _populate_node(self, entry, parent_node):
+        """Insert the direct children of entry; subfolders are filled in when opened"""
+        if entry.error:
+            self.file_tree.insert(parent_node, "end", text=entry.error, tags=("error",))
             return
         
-        # Sort items: folders first, then files
-        items.sort(key=lambda x: (os.path.isfile(os.path.join(folder_path, x)), x.lower()))
+        # Children are already sorted folders first, then files
+        for child in entry.children:
+            self._insert_child(parent_node, child, "end")
+    
+    def _insert_child(self, parent_node, child, index):
+        """Insert one folder or file row under parent_node"""
+        if not child.is_dir:
+            return self.file_tree.insert(
+                parent_node, index,
+                text=self._file_text(child),
+                tags=("file",),
+                values=(child.name,)
+            )
         
-        for item in items:
-            if item in ignore_folders:
+        node = self.file_tree.insert(
+            parent_node, index,
+            text=f"📁 {child.name}",
+            open=False,
+            tags=("folder",),
+            values=(child.name,)
+        )
+        self.folder_nodes[child.path] = node
+        if child.children or child.error:
+            # Placeholder so the folder shows an expand arrow
+            self.file_tree.insert(node, "end", text="")
+            self.unpopulated_nodes[node] = child
+        return node
+    
+    def _file_text(self, entry):
+        """Row label for a file"""
+        return f"📄 {entry.name} ({entry.lines} lines, ~{entry.tokens:,} tokens)"
+    
+    def update_folders(self, folders):
+        """Bring the rows of changed folders up to date, keeping expansion and selection"""
+        for entry in folders:
+            node = self.folder_nodes.get(entry.path)
+            if node is None or not self.file_tree.exists(node):
                 continue
             
-            item_path = os.path.join(folder_path, item)
+            collapsed_empty = not self.file_tree.get_children(node) and not self.file_tree.item(node, "open")
+            if node in self.unpopulated_nodes or collapsed_empty:
+                # Not expanded yet: refresh the entry and its expand arrow only
+                self.file_tree.delete(*self.file_tree.get_children(node))
+                self.unpopulated_nodes.pop(node, None)
+                if entry.children or entry.error:
+                    self.file_tree.insert(node, "end", text="")
+                    self.unpopulated_nodes[node] = entry
+                continue
             
-            if os.path.isdir(item_path):
-                node = self.file_tree.insert(
-                    parent_node, "end",
-                    text=f"📁 {item}",
-                    open=False,
-                    tags=("folder",),
-                    values=(item_path,)
-                )
-                self._populate_node(item_path, node, ignore_folders)
+            self._update_children(entry, node)
+    
+    def _update_children(self, entry, node):
+        """Diff the inserted rows of an expanded folder against its scanned children"""
+        existing = {}
+        for child_node in self.file_tree.get_children(node):
+            values = self.file_tree.item(child_node, "values")
+            if values:
+                existing[str(values[0])] = child_node
             else:
-                lines = self.controller.file_manager.count_lines_of_code(item_path)
-                self.file_tree.insert(
-                    parent_node, "end",
-                    text=f"📄 {item} ({lines} lines)",
-                    tags=("file",),
-                    values=(item_path,)
-                )
+                self.file_tree.delete(child_node)  # error row or placeholder
+        
+        if entry.error:
+            self.file_tree.delete(*existing.values())
+            self.file_tree.insert(node, "end", text=entry.error, tags=("error",))
+            return
+        
+        for index, child in enumerate(entry.children):
+            child_node = existing.pop(child.name, None)
+            if child_node is None or (child.is_dir != ("folder" in self.file_tree.item(child_node, "tags"))):
+                if child_node is not None:
+                    self.file_tree.delete(child_node)
+                self._insert_child(node, child, index)
+                continue
+            
+            self.file_tree.move(child_node, node, index)
+            if child.is_dir:
+                if child_node in self.unpopulated_nodes:
+                    self.unpopulated_nodes[child_node] = child
+            else:
+                self.file_tree.item(child_node, text=self._file_text(child))
+        
+        if existing:
+            self.file_tree.delete(*existing.values())
+    
+    def on_open(self, event):
+        """Populate a folder the first time it is expanded"""
+        node = self.file_tree.focus()
+        entry = self.unpopulated_nodes.pop(node, None)
+        if entry is None:
+            return
+        
+        self.file_tree.delete(*self.file_tree.get_children(node))
+        self._populate_node(entry, node)
     
     def on_double_click(self, event):
         """Handle double-click on tree item"""
@@ -116,11 +189,22 @@ class TreePanel:
         values = self.file_tree.item(item, "values")
         
         if values and len(values) > 0:
-            file_path = values[0]
+            file_path = self.node_path(item)
             # Check if it's a file
             if os.path.isfile(file_path):
                 self.controller.copy_single_file(file_path)
     
+    def node_path(self, node):
+        """Full path of a row, joined from the names stored along its node chain"""
+        parts = []
+        while node:
+            values = self.file_tree.item(node, "values")
+            if not values:
+                break  # root row
+            parts.append(str(values[0]))
+            node = self.file_tree.parent(node)
+        return os.path.join(self.root_path, *reversed(parts))
+    
     def get_frame(self):
         """Get the main frame"""
         return self.tree_frame
\ No newline at end of file
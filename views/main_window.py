@@ -2,13 +2,15 @@
 Main application window
 """
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk
 from utils.theme import ModernTheme
 from utils.constants import WINDOW_TITLE, WINDOW_MIN_WIDTH, WINDOW_MIN_HEIGHT
+from views.splash import center_window
 from views.components.header_panel import HeaderPanel
 from views.components.tree_panel import TreePanel
 from views.components.buttons_panel import ButtonsPanel
 from views.components.ascii_panel import AsciiPanel
+from models.folder_stats import format_stats_details
 
 class MainWindow:
     def __init__(self, root, controller):
@@ -24,15 +26,12 @@ class MainWindow:
     def setup_window(self):
         """Configure main window"""
         self.root.title(WINDOW_TITLE)
-        self.root.geometry(f"{WINDOW_MIN_WIDTH}x{WINDOW_MIN_HEIGHT}")
         self.root.minsize(WINDOW_MIN_WIDTH, WINDOW_MIN_HEIGHT)
         self.root.configure(bg=self.theme.BACKGROUND_PRIMARY)
         
-        # Center window on screen
-        self.root.update_idletasks()
-        x = (self.root.winfo_screenwidth() // 2) - (WINDOW_MIN_WIDTH // 2)
-        y = (self.root.winfo_screenheight() // 2) - (WINDOW_MIN_HEIGHT // 2)
-        self.root.geometry(f"{WINDOW_MIN_WIDTH}x{WINDOW_MIN_HEIGHT}+{x}+{y}")
+        # Center window on screen, unless the splash already showed it there
+        if not self.root.winfo_viewable():
+            center_window(self.root)
         
         # Configure window icon (if you have one)
         try:
@@ -137,8 +136,28 @@ class MainWindow:
         self.progress_var.set(message)
         self.root.update_idletasks()
     
-    def show_statistics_dialog(self, stats):
-        """Show folder statistics in a modal dialog that can be closed by clicking outside"""
+    def set_busy(self, busy):
+        """Toggle the UI between idle and background-work states"""
+        self.header_panel.set_cancel_enabled(busy)
+        self.root.config(cursor="watch" if busy else "")
+    
+    def ask_export_path(self, size_mb):
+        """Ask where to save a dump that is too big for the clipboard"""
+        from tkinter import messagebox, filedialog  # dialogs are loaded on first use
+        proceed = messagebox.askyesno(
+            "Too large for clipboard",
+            f"The selected files total {size_mb:,.1f} MB, which is too large to copy to the clipboard.\n\n"
+            "Save them to a file instead?"
+        )
+        if not proceed:
+            return None
+        return filedialog.asksaveasfilename(
+            defaultextension=".txt",
+            filetypes=[("Text files", "*.txt"), ("All files", "*.*")]
+        )
+    
+    def create_dialog(self, title, dialog_width=500, dialog_height=400):
+        """Create a modal dialog frame over an overlay that closes it when clicked"""
         # Create overlay frame that covers the entire window
         self.overlay_frame = tk.Frame(
             self.root,
@@ -162,8 +181,6 @@ class MainWindow:
         )
         
         # Center the dialog
-        dialog_width = 500
-        dialog_height = 400
         x = (self.root.winfo_width() - dialog_width) // 2
         y = (self.root.winfo_height() - dialog_height) // 2
         
@@ -175,16 +192,23 @@ class MainWindow:
         # Title
         title_label = tk.Label(
             self.stats_window,
-            text="📊 Folder Statistics",
+            text=title,
             **self.theme.get_label_style(14, "bold")
         )
         title_label.pack(pady=20)
+        return self.stats_window
+    
+    def show_statistics_dialog(self, stats):
+        """Show folder statistics in a modal dialog that can be closed by clicking outside"""
+        self.create_dialog("📊 Folder Statistics", 680, 600)
         
         # Statistics content frame
         content_frame = tk.Frame(self.stats_window, bg=self.theme.BACKGROUND_SECONDARY)
         content_frame.pack(expand=True, fill=tk.BOTH, padx=20, pady=(0, 20))
         
         # Statistics text
+        stats_scroll = ttk.Scrollbar(content_frame)
+        stats_scroll.pack(side=tk.RIGHT, fill=tk.Y)
         stats_text = tk.Text(
             content_frame,
             bg=self.theme.BACKGROUND_PRIMARY,
@@ -192,19 +216,54 @@ class MainWindow:
             font=(self.theme.FONT_MONO, 10),
             relief="flat",
             padx=20,
-            pady=20
+            pady=20,
+            wrap=tk.NONE,
+            yscrollcommand=stats_scroll.set
         )
         stats_text.pack(expand=True, fill=tk.BOTH)
+        stats_scroll.config(command=stats_text.yview)
         
         # Format statistics
         content = f"""Total Files: {stats['total_files']:,}
 Total Lines of Code: {stats['total_lines']:,}
+Estimated Tokens: ~{stats['total_tokens']:,} ({stats['token_estimator']})
 Total Folders: {stats['folder_count']:,}
-
-File Types:
 """
-        for ext, count in sorted(stats['file_types'].items()):
-            content += f"  {ext}: {count} files\n"
+        content += format_stats_details(stats)
+        
+        if stats.get('skipped_files'):
+            content += f"""
+Skipped Binary/Generated Files: {stats['skipped_files']:,} ({stats['skipped_bytes'] / (1024 * 1024):,.1f} MB not read)
+"""
+        
+        if stats.get('duplicate_files'):
+            content += f"""
+Duplicate Files: {stats['duplicate_files']:,} copies of {stats['duplicate_groups']:,} files
+({stats['duplicate_bytes']:,} bytes, {stats['duplicate_lines']:,} lines written once in dumps)
+"""
+        
+        if stats.get('tree_rows'):
+            content += f"""
+Tree Model: {stats['tree_rows']:,} rows, {stats['tree_bytes'] / 1024:,.0f} KB ({stats['tree_bytes'] // stats['tree_rows']} bytes/entry)
+"""
+        
+        if stats.get('ascii_lines'):
+            content += f"""ASCII Tree Buffer: {stats['ascii_lines']:,} lines, {stats['ascii_bytes'] / 1024:,.0f} KB
+"""
+        
+        if 'cache' in stats:
+            cache = stats['cache']
+            content += f"""
+Line Count Cache:
+  Entries: {cache['entries']:,} / {cache['max_entries']:,}
+  Hits: {cache['hits']:,}  Misses: {cache['misses']:,}
+  Evictions: {cache['evictions']:,}  Invalidated: {cache['invalidations']:,}
+"""
+            if 'index' in cache:
+                index = cache['index']
+                content += f"""  Index: {index['entries']:,} entries, {index['file_size']:,} bytes
+  Index hits: {index['hits']:,}  Misses: {index['misses']:,}
+"""
         
         stats_text.insert(tk.END, content)
         stats_text.config(state=tk.DISABLED)
@@ -232,6 +291,74 @@ File Types:
         )
         info_label.pack(side=tk.LEFT)
 
+    def show_diagnostics_dialog(self, report, enabled, profile):
+        """Show timings of the last operation with instrumentation toggles"""
+        self.create_dialog("🩺 Diagnostics", 600, 480)
+        
+        # Toggles
+        toggles_frame = tk.Frame(self.stats_window, bg=self.theme.BACKGROUND_SECONDARY)
+        toggles_frame.pack(fill=tk.X, padx=20, pady=(0, 10))
+        enabled_var = tk.BooleanVar(value=enabled)
+        profile_var = tk.BooleanVar(value=profile)
+        apply_toggles = lambda: self.controller.set_instrumentation(enabled_var.get(), profile_var.get())
+        for text, variable in (("Record timings", enabled_var), ("Collect cProfile data", profile_var)):
+            tk.Checkbutton(
+                toggles_frame,
+                text=text,
+                variable=variable,
+                command=apply_toggles,
+                bg=self.theme.BACKGROUND_SECONDARY,
+                fg=self.theme.TEXT_PRIMARY,
+                selectcolor=self.theme.BACKGROUND_TERTIARY,
+                activebackground=self.theme.BACKGROUND_SECONDARY,
+                activeforeground=self.theme.TEXT_PRIMARY,
+                font=(self.theme.FONT_FAMILY, 10)
+            ).pack(side=tk.LEFT, padx=(0, 15))
+        
+        # Report text
+        content_frame = tk.Frame(self.stats_window, bg=self.theme.BACKGROUND_SECONDARY)
+        content_frame.pack(expand=True, fill=tk.BOTH, padx=20, pady=(0, 20))
+        report_text = tk.Text(
+            content_frame,
+            bg=self.theme.BACKGROUND_PRIMARY,
+            fg=self.theme.TEXT_PRIMARY,
+            font=(self.theme.FONT_MONO, 10),
+            relief="flat",
+            padx=20,
+            pady=20
+        )
+        report_text.pack(expand=True, fill=tk.BOTH)
+        report_text.insert(tk.END, report)
+        report_text.config(state=tk.DISABLED)
+        
+        # Button frame
+        button_frame = tk.Frame(self.stats_window, bg=self.theme.BACKGROUND_SECONDARY)
+        button_frame.pack(fill=tk.X, padx=20, pady=(0, 20))
+        
+        close_button = tk.Button(
+            button_frame,
+            text="Close",
+            command=self.close_statistics_dialog,
+            **self.theme.get_button_style(self.theme.ACCENT_BLUE)
+        )
+        close_button.pack(side=tk.RIGHT)
+        
+        profile_button = tk.Button(
+            button_frame,
+            text="💾 Save Profile",
+            command=self.controller.save_profile,
+            **self.theme.get_button_style(self.theme.BACKGROUND_TERTIARY)
+        )
+        profile_button.pack(side=tk.RIGHT, padx=(0, 10))
+    
+    def ask_profile_path(self):
+        """Ask where to save cProfile data"""
+        from tkinter import filedialog
+        return filedialog.asksaveasfilename(
+            defaultextension=".pstats",
+            filetypes=[("pstats files", "*.pstats *.prof"), ("All files", "*.*")]
+        )
+    
     def close_statistics_dialog(self):
         """Close the statistics dialog"""
         if hasattr(self, 'overlay_frame'):
@@ -0,0 +1,34 @@
+"""
+First frame shown while the controller, models and panels are imported
+"""
+import tkinter as tk
+from utils.theme import ModernTheme
+from utils.constants import WINDOW_TITLE, WINDOW_MIN_WIDTH, WINDOW_MIN_HEIGHT
+
+def center_window(root):
+    """Place the window in the middle of the screen at its minimum size"""
+    # The screen size is known before the first layout pass, so no update_idletasks is needed
+    x = (root.winfo_screenwidth() // 2) - (WINDOW_MIN_WIDTH // 2)
+    y = (root.winfo_screenheight() // 2) - (WINDOW_MIN_HEIGHT // 2)
+    root.geometry(f"{WINDOW_MIN_WIDTH}x{WINDOW_MIN_HEIGHT}+{x}+{y}")
+
+def show_splash(root) -> tk.Label:
+    """Draw a themed, centered window with a loading message; destroy the label once the UI is built"""
+    theme = ModernTheme()
+    root.title(WINDOW_TITLE)
+    root.minsize(WINDOW_MIN_WIDTH, WINDOW_MIN_HEIGHT)
+    root.configure(bg=theme.BACKGROUND_PRIMARY)
+    center_window(root)
+
+    splash = tk.Label(
+        root,
+        text="📁 Loading File Structure Viewer...",
+        bg=theme.BACKGROUND_PRIMARY,
+        fg=theme.TEXT_SECONDARY,
+        font=(theme.FONT_FAMILY, 14, "bold")
+    )
+    splash.place(relx=0.5, rely=0.5, anchor=tk.CENTER)
+
+    # Paint now, before the heavy imports block the event loop
+    root.update()
+    return splash